@@ -0,0 +1,159 @@
+"""Compare in-flight LLM calls and memory for the thread-pool and the async ``llm_call``.
+
+Each mode runs in a fresh subprocess and pushes ``--calls`` mocked LLM calls (litellm's
+``mock_response`` with a fixed ``mock_delay``, so no network or API key is needed):
+
+* ``threads``: the previous Worker setup, a blocking ``completion()`` per call on a
+  ``ThreadPoolExecutor(max_workers=100)``.
+* ``async``: the ``llm_call`` Activity the report demos share, awaited on one event loop and
+  bounded by the Worker's ``max_concurrent_activities``.
+
+Run it with ``uv run benchmarks/llm_call_concurrency.py --calls 2000 --latency 2``.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from litellm import acompletion, completion
+from temporalio.testing import ActivityEnvironment
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "demos"))
+from common import report_activities
+from common.report_models import LLMCallInput
+
+
+class InFlight:
+    def __init__(self) -> None:
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> None:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc: object) -> None:
+        with self._lock:
+            self.current -= 1
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def prepare_threads(calls: int, latency: float, max_workers: int) -> Callable[[], int]:
+    def run() -> int:
+        in_flight = InFlight()
+
+        def call(i: int) -> None:
+            with in_flight:
+                completion(
+                    model="openai/gpt-4o",
+                    messages=[{"content": f"prompt {i}", "role": "user"}],
+                    mock_response="mocked report",
+                    mock_delay=latency,
+                )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(call, range(calls)))
+        return in_flight.peak
+
+    return run
+
+
+def prepare_async(calls: int, latency: float, max_concurrent: int) -> Callable[[], int]:
+    # Measure the calls themselves, whatever LLM_CACHE the imported Activities picked up from .env
+    report_activities.RESPONSE_CACHE = None
+    # The Activity calls the acompletion it imported, so that's the name to replace
+    report_activities.acompletion = functools.partial(  # type: ignore[attr-defined]
+        acompletion, mock_response="mocked report", mock_delay=latency
+    )
+    env = ActivityEnvironment()
+
+    def run() -> int:
+        in_flight = InFlight()
+
+        async def main() -> None:
+            slots = asyncio.Semaphore(max_concurrent)
+
+            async def call(i: int) -> None:
+                async with slots:
+                    with in_flight:
+                        await env.run(report_activities.llm_call, LLMCallInput(prompt=f"prompt {i}"))
+
+            await asyncio.gather(*(call(i) for i in range(calls)))
+
+        asyncio.run(main())
+        return in_flight.peak
+
+    return run
+
+
+def run_mode(args: argparse.Namespace) -> None:
+    # Measure the baseline after setup so RSS growth only counts memory held by in-flight calls
+    if args.mode == "threads":
+        run = prepare_threads(args.calls, args.latency, args.thread_pool_size)
+    else:
+        run = prepare_async(args.calls, args.latency, args.max_concurrent_activities)
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    peak = run()
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "mode": args.mode,
+                "seconds": elapsed,
+                "calls_per_second": args.calls / elapsed,
+                "peak_in_flight": peak,
+                "peak_rss_mb": peak_rss_mb(),
+                "rss_growth_mb": peak_rss_mb() - baseline_rss,
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=2.0, help="simulated seconds per LLM call")
+    parser.add_argument("--thread-pool-size", type=int, default=100)
+    parser.add_argument("--max-concurrent-activities", type=int, default=1000)
+    parser.add_argument("--mode", choices=["threads", "async"], help="run a single mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    # Run each mode in its own interpreter so their peak RSS numbers don't mix
+    print(f"{'mode':<8} {'seconds':>8} {'calls/s':>8} {'in-flight':>10} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+    for mode in ("threads", "async"):
+        output = subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], "--mode", mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<8} {result['seconds']:>8.1f} {result['calls_per_second']:>8.1f} {result['peak_in_flight']:>10}"
+            f" {result['peak_rss_mb']:>12.1f} {result['rss_growth_mb']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure per-report PDF render time with and without the shared style cache.
+
+``uncached`` is the setup every ``create_pdf`` used to do on each call (a fresh sample
+stylesheet and title style); ``cached`` is ``common.report_rendering.render_report``.
+Reports are rendered into memory so disk speed doesn't hide the setup cost:
+
+    uv run benchmarks/pdf_render.py --reports 500 --paragraphs 5
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "demos"))
+from common.report_rendering import render_report
+
+
+def render_uncached(content: str, output: io.BytesIO) -> None:
+    doc = SimpleDocTemplate(output, pagesize=letter)
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=1,
+    )
+
+    story: list[Flowable] = []
+    story.append(Paragraph("Research Report", title_style))
+    story.append(Spacer(1, 20))
+
+    for para in content.split("\n\n"):
+        if para.strip():
+            story.append(Paragraph(para.strip(), styles["Normal"]))
+            story.append(Spacer(1, 12))
+
+    doc.build(story)
+
+
+def time_renders(render: Callable[[str, io.BytesIO], None], content: str, reports: int) -> list[float]:
+    timings = []
+    for _ in range(reports):
+        start = time.perf_counter()
+        render(content, io.BytesIO())
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=500)
+    parser.add_argument("--paragraphs", type=int, default=5, help="paragraphs per report")
+    args = parser.parse_args()
+
+    content = "\n\n".join(
+        f"Fact {i}: tardigrades can survive the vacuum of space. " * 3 for i in range(args.paragraphs)
+    )
+
+    # One throwaway render each so module imports and reportlab's own font caches are warm for both
+    render_uncached(content, io.BytesIO())
+    render_report(content, io.BytesIO())
+
+    print(f"{args.reports} reports of {args.paragraphs} paragraphs")
+    print(f"{'mode':<9} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode, render in (("uncached", render_uncached), ("cached", render_report)):
+        timings = sorted(time_renders(render, content, args.reports))
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{mode:<9} {statistics.mean(timings):>8.2f} {statistics.median(timings):>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
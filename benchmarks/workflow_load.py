@@ -0,0 +1,268 @@
+"""Run N concurrent demo Workflows against a local Temporal server with a fake LLM and tool backend.
+
+No network access or API key is needed. The Worker runs in this process with
+fake backends, and the Workflows run unchanged:
+
+* ``report``: ``GenerateReportWorkflow`` from module_one_02. ``llm_call`` uses
+  litellm's ``mock_response`` with a delay, and PDFs are rendered for real into a
+  temporary blob directory. Workflows get an explicit ``ReportConfig``, so the
+  demo pause is off even when ``.env`` sets ``DEMO_PAUSE_SECONDS``.
+* ``tool-calling`` / ``agent``: ``ToolCallingWorkflow`` / ``AgentWorkflow`` from
+  module_one_04. A fake ``create`` Activity asks for ``--tool-calls`` tools per
+  turn for ``--turns`` turns, then answers. The tools are fakes that sleep for
+  ``--tool-latency``.
+
+Each simulated LLM call takes ``--llm-latency`` seconds. If ``--tokens-per-second``
+is set, it also takes ``--completion-tokens / --tokens-per-second`` more.
+
+The benchmark reports throughput, p50/p99 end-to-end latency, and the CPU and peak
+RSS of this process (Worker plus client; the server runs in its own process). By
+default it starts Temporal's local dev server, which is downloaded on first use.
+Pass ``--address`` to use a server that's already running
+(e.g. ``temporal server start-dev``).
+
+Run it with ``uv run benchmarks/workflow_load.py agent --workflows 200 --tool-calls 3``.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Sequence  # noqa: UP035 - dynamic activities must take typing.Sequence[RawValue]
+
+from litellm import acompletion
+from openai.types.responses import Response
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.common import RawValue
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.converter import DataConverter
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+DEMOS = Path(__file__).resolve().parents[1] / "demos"
+TASK_QUEUE = "benchmark"
+# Arguments the fake LLM passes to tools that take any
+TOOL_ARGUMENTS = {"get_weather_alerts": {"state": "CA"}, "get_location_info": {"ipaddress": "127.0.0.1"}}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+def llm_seconds(args: argparse.Namespace) -> float:
+    if args.tokens_per_second <= 0:
+        return float(args.llm_latency)
+    return float(args.llm_latency + args.completion_tokens / args.tokens_per_second)
+
+
+Scenario = tuple[Worker, Callable[[Client, int], Awaitable[object]]]
+
+
+def report_scenario(client: Client, args: argparse.Namespace) -> Scenario:
+    # The demo modules share module names (models, workflow, ...), so only import the one being benchmarked
+    sys.path.insert(0, str(DEMOS / "module_one_02_adding_durability"))
+    import activities  # noqa: PLC0415
+    from common import report_activities  # noqa: PLC0415
+    from models import GenerateReportInput, PDFOutput, ReportConfig  # noqa: PLC0415
+    from workflow import GenerateReportWorkflow  # noqa: PLC0415
+
+    # Keep the benchmark hermetic: no response cache, and blob PDFs go to a throwaway directory. Importing the
+    # Activities loads .env with override=True, so this has to come after the imports
+    report_activities.RESPONSE_CACHE = None
+    os.environ["PDF_SINK"] = "local"
+    os.environ["PDF_SINK_DIR"] = tempfile.mkdtemp(prefix="benchmark-reports-")
+    # The Activity calls the acompletion it imported, so that's the name to replace
+    report_activities.acompletion = functools.partial(  # type: ignore[attr-defined]
+        acompletion, mock_response="lorem " * args.completion_tokens, mock_delay=llm_seconds(args)
+    )
+    worker = Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[GenerateReportWorkflow],
+        activities=[activities.llm_call, activities.stream_llm_call, activities.create_pdf],
+        max_concurrent_activities=args.max_concurrent_activities,
+    )
+
+    async def run(client: Client, i: int) -> object:
+        return await client.execute_workflow(
+            GenerateReportWorkflow.run,
+            GenerateReportInput(prompt=f"benchmark prompt {i}", pdf_output=PDFOutput.BLOB, config=ReportConfig()),
+            id=f"benchmark-report-{uuid.uuid4()}",
+            task_queue=TASK_QUEUE,
+        )
+
+    return worker, run
+
+
+def agent_scenario(client: Client, args: argparse.Namespace) -> Scenario:
+    sys.path.insert(0, str(DEMOS / "module_one_04_ai_agents"))
+    from models import OpenAIResponsesRequest  # noqa: PLC0415
+    from workflow import AgentWorkflow, ToolCallingWorkflow  # noqa: PLC0415
+
+    def response(output: list[dict[str, object]]) -> Response:
+        return Response.model_validate(
+            {
+                "id": f"resp_{uuid.uuid4().hex}",
+                "created_at": 0,
+                "model": "fake",
+                "object": "response",
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+                "output": output,
+                "usage": {
+                    "input_tokens": 100,
+                    "output_tokens": args.completion_tokens,
+                    "total_tokens": 100 + args.completion_tokens,
+                    "input_tokens_details": {"cached_tokens": 0},
+                    "output_tokens_details": {"reasoning_tokens": 0},
+                },
+            }
+        )
+
+    @activity.defn(name="create")
+    async def fake_create(request: OpenAIResponsesRequest) -> Response:
+        await asyncio.sleep(llm_seconds(args))
+        items = request.input if isinstance(request.input, list) else []
+        turns_done = sum(1 for item in items if item.get("type") == "function_call") // max(args.tool_calls, 1)
+        tools = request.tool_names or [tool["name"] for tool in request.tools]
+        if not tools or turns_done >= args.turns:
+            text = {"type": "output_text", "text": "lorem " * args.completion_tokens, "annotations": []}
+            return response(
+                [{"type": "message", "id": "msg", "role": "assistant", "status": "completed", "content": [text]}]
+            )
+
+        calls = []
+        for n in range(args.tool_calls):
+            name = tools[n % len(tools)]
+            call_id = f"call_{turns_done}_{n}"
+            calls.append(
+                {
+                    "type": "function_call",
+                    "id": f"fc_{call_id}",
+                    "call_id": call_id,
+                    "name": name,
+                    "arguments": json.dumps(TOOL_ARGUMENTS.get(name, {})),
+                    "status": "completed",
+                }
+            )
+        return response(calls)
+
+    @activity.defn(name="get_weather_alerts")
+    async def fake_weather_alerts(request: object) -> str:  # noqa: ARG001
+        await asyncio.sleep(args.tool_latency)
+        return json.dumps({"features": []})
+
+    @activity.defn(dynamic=True)
+    async def fake_tool(tool_args: Sequence[RawValue]) -> str:  # noqa: ARG001
+        await asyncio.sleep(args.tool_latency)
+        return f"result of {activity.info().activity_type}"
+
+    workflow_class = AgentWorkflow if args.workflow == "agent" else ToolCallingWorkflow
+    worker = Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[workflow_class],
+        activities=[fake_create, fake_weather_alerts, fake_tool],
+        max_concurrent_activities=args.max_concurrent_activities,
+    )
+
+    async def run(client: Client, i: int) -> object:
+        return await client.execute_workflow(
+            workflow_class.run,
+            f"benchmark query {i}",
+            id=f"benchmark-{args.workflow}-{uuid.uuid4()}",
+            task_queue=TASK_QUEUE,
+        )
+
+    return worker, run
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, float]:
+    data_converter = DataConverter.default if args.workflow == "report" else pydantic_data_converter
+    env: WorkflowEnvironment | None = None
+    if args.address:
+        client = await Client.connect(args.address, data_converter=data_converter)
+    elif args.server == "time-skipping":
+        env = await WorkflowEnvironment.start_time_skipping(data_converter=data_converter)
+        client = env.client
+    else:
+        env = await WorkflowEnvironment.start_local(data_converter=data_converter)
+        client = env.client
+
+    worker, run = report_scenario(client, args) if args.workflow == "report" else agent_scenario(client, args)
+    latencies: list[float] = []
+
+    async def timed(i: int) -> None:
+        started = time.perf_counter()
+        await run(client, i)
+        latencies.append(time.perf_counter() - started)
+
+    try:
+        async with worker:
+            baseline_cpu = cpu_seconds()
+            started = time.perf_counter()
+            await asyncio.gather(*(timed(i) for i in range(args.workflows)))
+            elapsed = time.perf_counter() - started
+            cpu = cpu_seconds() - baseline_cpu
+    finally:
+        if env is not None:
+            await env.shutdown()
+
+    return {
+        "seconds": elapsed,
+        "workflows_per_second": args.workflows / elapsed,
+        "p50_seconds": percentile(latencies, 50),
+        "p99_seconds": percentile(latencies, 99),
+        "cpu_percent": 100 * cpu / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workflow", choices=["report", "tool-calling", "agent"])
+    parser.add_argument("--workflows", type=int, default=100, help="concurrent Workflows to run")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="simulated seconds per LLM call")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="simulated generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--tool-calls", type=int, default=3, help="tools the fake LLM asks for per turn")
+    parser.add_argument("--turns", type=int, default=1, help="tool-calling turns before the fake LLM answers")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="simulated seconds per tool call")
+    parser.add_argument("--max-concurrent-activities", type=int, default=1000)
+    parser.add_argument("--server", choices=["local", "time-skipping"], default="local")
+    parser.add_argument("--address", help="use an already running server instead of starting one")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args))
+    print(f"{'workflows':>9} {'seconds':>8} {'wf/s':>8} {'p50 s':>8} {'p99 s':>8} {'CPU %':>7} {'peak RSS MB':>12}")
+    print(
+        f"{args.workflows:>9} {result['seconds']:>8.1f} {result['workflows_per_second']:>8.1f}"
+        f" {result['p50_seconds']:>8.2f} {result['p99_seconds']:>8.2f} {result['cpu_percent']:>7.0f}"
+        f" {result['peak_rss_mb']:>12.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
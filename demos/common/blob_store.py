@@ -0,0 +1,86 @@
+"""Blob sinks that rendered reports are streamed to instead of a fixed local filename.
+
+Objects are named by the SHA-256 of their content, so concurrent reports never overwrite
+each other and identical reports are stored once. Pick a sink with ``PDF_SINK``:
+``local`` (a directory, ``PDF_SINK_DIR``) or ``s3`` (any S3-compatible endpoint such as a
+local MinIO, ``PDF_SINK_S3_ENDPOINT`` and ``PDF_SINK_S3_BUCKET``; needs ``boto3``).
+"""
+
+import functools
+import hashlib
+import io
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Protocol
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobSink(Protocol):
+    def write(self, data: io.BytesIO, suffix: str) -> str:
+        """Store the contents of ``data`` and return a reference to the stored object."""
+        ...
+
+
+def iter_chunks(data: io.BytesIO, chunk_size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+    """Yield ``data``'s contents in chunks without copying the underlying buffer."""
+    view = data.getbuffer()
+    for start in range(0, len(view), chunk_size):
+        yield view[start : start + chunk_size]
+
+
+def content_name(chunks: Iterable[bytes | memoryview], suffix: str) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return f"{digest.hexdigest()}{suffix}"
+
+
+class LocalDirectorySink:
+    def __init__(self, directory: str) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def write(self, data: io.BytesIO, suffix: str) -> str:
+        target = self._directory / content_name(iter_chunks(data), suffix)
+        if target.exists():
+            return str(target)
+
+        # Write to a temporary file and rename it, so readers never see a partially written report
+        with tempfile.NamedTemporaryFile(dir=self._directory, suffix=".part", delete=False) as tmp:
+            for chunk in iter_chunks(data):
+                tmp.write(chunk)
+        Path(tmp.name).replace(target)
+        return str(target)
+
+
+class S3Sink:
+    def __init__(self, bucket: str, endpoint_url: str | None = None) -> None:
+        try:
+            import boto3  # noqa: PLC0415 - optional dependency, only needed for this sink
+            from boto3.s3.transfer import TransferConfig  # noqa: PLC0415
+        except ImportError as e:
+            raise RuntimeError("PDF_SINK=s3 needs boto3: run `uv add boto3`") from e
+
+        self._bucket = bucket
+        self._client = boto3.client("s3", endpoint_url=endpoint_url)
+        self._transfer_config = TransferConfig(multipart_chunksize=max(CHUNK_SIZE, 5 * 1024 * 1024))
+
+    def write(self, data: io.BytesIO, suffix: str) -> str:
+        key = content_name(iter_chunks(data), suffix)
+        data.seek(0)
+        self._client.upload_fileobj(data, self._bucket, key, Config=self._transfer_config)
+        return f"s3://{self._bucket}/{key}"
+
+
+@functools.cache
+def sink_from_env() -> BlobSink:
+    """Build the sink selected by ``PDF_SINK`` once per process."""
+    sink = os.getenv("PDF_SINK", "local").lower()
+    if sink == "local":
+        return LocalDirectorySink(os.getenv("PDF_SINK_DIR", "reports"))
+    if sink == "s3":
+        return S3Sink(os.getenv("PDF_SINK_S3_BUCKET", "reports"), os.getenv("PDF_SINK_S3_ENDPOINT"))
+    raise ValueError(f"Unknown PDF_SINK: {sink}")
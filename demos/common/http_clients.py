@@ -0,0 +1,58 @@
+"""Connection-pooled HTTP clients shared by every activity in a worker process.
+
+Opening a client per call pays for a new TCP connection and TLS handshake each
+time. The clients here are built once, on first use inside the worker's event
+loop. They keep connections alive between activities and use HTTP/2.
+
+The tools and the LLM client have separate pools, so a burst of tool calls can't
+take the connections a model request is waiting for, and the reverse. Their
+limits come from the environment:
+
+``HTTP_MAX_CONNECTIONS`` (default 100), ``HTTP_MAX_KEEPALIVE_CONNECTIONS``
+(default 20) and ``HTTP_KEEPALIVE_EXPIRY`` in seconds (default 30) size the
+tools' pool. The same variables prefixed with ``LLM_`` (e.g.
+``LLM_HTTP_MAX_CONNECTIONS``) size the LLM client's pool, with the same defaults.
+"""
+
+import functools
+import os
+
+import httpx
+from openai import AsyncOpenAI
+
+
+def limits_from_env(prefix: str = "HTTP") -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+@functools.cache
+def http_client() -> httpx.AsyncClient:
+    """Return the worker's shared ``httpx.AsyncClient`` for tool calls."""
+    return httpx.AsyncClient(http2=True, limits=limits_from_env(), timeout=httpx.Timeout(10.0))
+
+
+@functools.cache
+def llm_http_client() -> httpx.AsyncClient:
+    """Return the ``httpx.AsyncClient`` behind the LLM client, pooled separately from the tools'."""
+    # No client-wide timeout: AsyncOpenAI sets one on every request
+    return httpx.AsyncClient(http2=True, limits=limits_from_env("LLM_HTTP"))
+
+
+@functools.cache
+def openai_client(api_key: str | None) -> AsyncOpenAI:
+    """Return an ``AsyncOpenAI`` client that sends its requests over the LLM connection pool."""
+    # Temporal best practice: Disable retry logic in OpenAI API client library.
+    return AsyncOpenAI(api_key=api_key, max_retries=0, http_client=llm_http_client())
+
+
+async def close_http_clients() -> None:
+    """Close the shared clients; call this when the worker shuts down."""
+    for client in (http_client, llm_http_client):
+        if client.cache_info().currsize:
+            await client().aclose()
+        client.cache_clear()
+    openai_client.cache_clear()
@@ -0,0 +1,124 @@
+"""Content-addressed cache for LLM responses, shared by the demo activities.
+
+Responses are stored as JSON strings keyed by a SHA-256 hash of the model name and
+the activity input, so two calls with the same (model, instructions, messages, tools)
+are answered once. Pick a backend with the ``LLM_CACHE`` environment variable:
+``memory`` (LRU with TTL, per worker process), ``sqlite`` (on disk, shared by every
+worker on the host) or ``off`` (the default).
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class ResponseCache(Protocol):
+    stats: CacheStats
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+def _jsonable(value: object) -> object:
+    # Dataclasses, including ones nested in lists and dicts, are hashed as dicts so their keys are sorted too
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def cache_key(model: str, request: object) -> str:
+    """Return a canonical hash of ``request`` (dataclasses and JSON-compatible values) for ``model``."""
+    canonical = json.dumps([model, request], sort_keys=True, separators=(",", ":"), default=_jsonable)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe LRU cache whose entries expire ``ttl`` seconds after they are written."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0) -> None:
+        self.stats = CacheStats()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+
+class SQLiteCache:
+    """On-disk cache, so responses survive worker restarts and are shared between processes."""
+
+    def __init__(self, path: str = ".llm_cache.sqlite3", ttl: float = 86400.0) -> None:
+        self.stats = CacheStats()
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT expires_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] < time.time():
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            value: str = row[1]
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + self._ttl, value),
+            )
+
+
+def cache_from_env() -> ResponseCache | None:
+    """Build the cache selected by ``LLM_CACHE``, ``LLM_CACHE_TTL`` and ``LLM_CACHE_PATH``."""
+    backend = os.getenv("LLM_CACHE", "off").lower()
+    ttl = float(os.getenv("LLM_CACHE_TTL", "3600"))
+    if backend == "memory":
+        return MemoryCache(max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")), ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteCache(path=os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3"), ttl=ttl)
+    if backend == "off":
+        return None
+    raise ValueError(f"Unknown LLM_CACHE backend: {backend}")
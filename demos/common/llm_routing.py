@@ -0,0 +1,234 @@
+"""Hedged requests, failover and circuit breaking across LLM providers.
+
+``LLM_MODEL`` is the primary model. ``LLM_FALLBACK_MODELS`` is a comma-separated
+list of backups, tried in order, e.g. ``openai/gpt-4o-mini,azure/gpt-4o``. Each
+model uses litellm's usual credentials for its provider. The primary model also
+uses ``LLM_API_KEY``.
+
+- Hedging: if the primary hasn't answered after its recent
+  ``LLM_HEDGE_PERCENTILE`` latency (default p95, never less than
+  ``LLM_HEDGE_MIN_DELAY`` seconds), the same request is also sent to the next
+  model. The first answer wins and the slower request is cancelled. Until
+  enough latencies have been seen, the delay is ``LLM_HEDGE_DELAY`` (default
+  10s). Set ``LLM_HEDGE=off`` to keep only failover.
+- Failover: a request that fails with a server error, a timeout, a connection
+  error or a 429 moves straight on to the next model instead of waiting for a
+  Temporal retry. Other errors, such as a bad request or a bug in the calling
+  code, would fail on every model, so they are raised as they are.
+- Circuit breaking: after ``LLM_BREAKER_FAILURES`` (default 5) such failures in
+  a row, a model is skipped for ``LLM_BREAKER_RESET`` seconds (default 30).
+  After that, one trial request decides whether it's back.
+
+Routing is per worker process. With no fallback models configured, every call
+goes to ``LLM_MODEL`` as before, with no hedging or circuit breaking: there is
+no other model to send it to, so failures are left to Temporal's retries.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+import httpx
+import openai
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+
+
+@dataclass(frozen=True)
+class LLMProvider:
+    model: str
+    api_key: str | None = None
+
+
+class CircuitBreaker:
+    """Closed until ``failure_threshold`` failures in a row, then open for ``reset_timeout`` seconds."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        # Half-open: once the reset timeout has passed, let a single trial request through
+        if self._trial_in_flight or self.retry_in() > 0:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a trial request through (0 when closed)."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self._reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        # A cancelled trial told us nothing, so the next caller gets to try
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Recent successful call latencies, for choosing when to hedge."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        if len(self._samples) < self._min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+# Requests that never got an answer. litellm's timeout and connection errors subclass openai's
+_UNANSWERED = (openai.APIConnectionError, httpx.TransportError, TimeoutError, ConnectionError)
+
+
+def _fails_over(error: BaseException) -> bool:
+    """Whether another model might answer: a timeout, a connection error, a 429 or a server error."""
+    if isinstance(error, _UNANSWERED):
+        return True
+    # common.rate_limit.throttled re-raises a 429 that carries Retry-After as this
+    if isinstance(error, ApplicationError) and error.type == "RateLimited":
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status in (408, 429) or status >= 500)
+
+
+class LLMRouter:
+    """Sends each call to the first healthy provider, hedging and failing over to the others."""
+
+    def __init__(
+        self,
+        providers: list[LLMProvider],
+        *,
+        hedge: bool = True,
+        hedge_percentile: float = 95,
+        hedge_delay: float = 10.0,
+        hedge_min_delay: float = 2.0,
+        breaker_failures: int = 5,
+        breaker_reset: float = 30.0,
+    ) -> None:
+        self.providers = providers
+        self._hedge = hedge and len(providers) > 1
+        # A single model's breaker would only turn Temporal's retries into ProvidersUnavailable errors
+        self._break_circuits = len(providers) > 1
+        self._hedge_percentile = hedge_percentile
+        self._hedge_delay = hedge_delay
+        self._hedge_min_delay = hedge_min_delay
+        self._breakers = {p.model: CircuitBreaker(breaker_failures, breaker_reset) for p in providers}
+        self._latencies = {p.model: LatencyTracker() for p in providers}
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        observed = self._latencies[provider.model].percentile(self._hedge_percentile)
+        return self._hedge_delay if observed is None else max(self._hedge_min_delay, observed)
+
+    async def _attempt[T](self, provider: LLMProvider, fn: Callable[[LLMProvider], Awaitable[T]]) -> T:
+        breaker = self._breakers[provider.model]
+        started = time.monotonic()
+        try:
+            result = await fn(provider)
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception as e:
+            if _fails_over(e):
+                breaker.record_failure()
+            else:
+                breaker.record_cancelled()
+            raise
+        breaker.record_success()
+        self._latencies[provider.model].record(time.monotonic() - started)
+        return result
+
+    async def call[T](self, fn: Callable[[LLMProvider], Awaitable[T]]) -> T:
+        """Return ``fn(provider)`` from whichever provider answers first."""
+        waiting = deque(self.providers)
+        pending: dict[asyncio.Task[T], LLMProvider] = {}
+        last_error: BaseException | None = None
+
+        def launch() -> bool:
+            # Skip providers whose breaker is open; the breaker is only asked when a request would really be sent
+            while waiting:
+                provider = waiting.popleft()
+                if not self._break_circuits or self._breakers[provider.model].allow():
+                    pending[asyncio.ensure_future(self._attempt(provider, fn))] = provider
+                    return True
+            return False
+
+        launch()
+        try:
+            while pending:
+                # The hedge timer follows the most recently started request
+                timeout = self.hedge_delay(list(pending.values())[-1]) if self._hedge and waiting else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        activity.logger.info(f"Hedging LLM call to {list(pending.values())[-1].model} after {timeout}s")
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if (error := task.exception()) is None:
+                        return task.result()
+                    if not _fails_over(error):
+                        raise error
+                    activity.logger.warning(f"LLM call to {provider.model} failed: {error!r}")
+                    last_error = error
+                if not pending:
+                    launch()
+        finally:
+            # Cancel the losing requests so they stop using a connection and rate limit budget
+            for task in pending:
+                task.cancel()
+
+        if last_error is not None:
+            raise last_error
+        retry_in = min(breaker.retry_in() for breaker in self._breakers.values())
+        raise ApplicationError(
+            "Every LLM provider's circuit breaker is open",
+            type="ProvidersUnavailable",
+            next_retry_delay=timedelta(seconds=max(retry_in, 1.0)),
+        )
+
+
+def providers_from_env() -> list[LLMProvider]:
+    primary = LLMProvider(os.getenv("LLM_MODEL", "openai/gpt-4o"), os.getenv("LLM_API_KEY") or None)
+    fallbacks = [model.strip() for model in os.getenv("LLM_FALLBACK_MODELS", "").split(",") if model.strip()]
+    return [primary, *(LLMProvider(model) for model in fallbacks)]
+
+
+@functools.cache
+def llm_router_from_env() -> LLMRouter:
+    return LLMRouter(
+        providers_from_env(),
+        hedge=os.getenv("LLM_HEDGE", "on").lower() != "off",
+        hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        hedge_delay=float(os.getenv("LLM_HEDGE_DELAY", "10")),
+        hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "2")),
+        breaker_failures=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        breaker_reset=float(os.getenv("LLM_BREAKER_RESET", "30")),
+    )
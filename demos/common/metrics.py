@@ -0,0 +1,78 @@
+"""Activity latency, queue delay, retry, token and cache metrics for the demo workers.
+
+Set ``METRICS_PORT`` to serve everything in Prometheus format from
+``http://localhost:<port>/metrics``. The demo metrics below are served
+alongside the SDK's own ``temporal_*`` metrics, through the Temporal
+runtime's built-in exporter. Without it, recording is a no-op.
+
+- ``demo_activity_duration`` (per activity type and outcome). Tools in the agent
+  demo run as activities named after the tool, so each tool gets its own series.
+- ``demo_activity_queue_delay``: time from an attempt being scheduled to a worker
+  starting it.
+- ``demo_activity_retries``: attempts after the first.
+- ``demo_llm_tokens``: prompt and completion tokens per model and workflow type.
+- ``demo_llm_cache_lookups``: response cache hits and misses.
+"""
+
+import os
+import time
+from datetime import timedelta
+
+from temporalio import activity
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor
+
+
+def runtime_from_env() -> Runtime | None:
+    """Return a runtime that serves Prometheus metrics on ``METRICS_PORT``, or None for the default runtime."""
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    return Runtime(
+        telemetry=TelemetryConfig(metrics=PrometheusConfig(bind_address=f"0.0.0.0:{port}", durations_as_seconds=True))
+    )
+
+
+class MetricsInterceptor(Interceptor):
+    """Worker interceptor that times every activity attempt."""
+
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetricsInterceptor(next)
+
+
+class _ActivityMetricsInterceptor(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput) -> object:
+        info = activity.info()
+        meter = activity.metric_meter().with_additional_attributes({"workflow_type": info.workflow_type})
+
+        meter.create_histogram_timedelta(
+            "demo_activity_queue_delay", "Time from an activity attempt being scheduled to it starting", "duration"
+        ).record(max(info.started_time - info.current_attempt_scheduled_time, timedelta(0)))
+        if info.attempt > 1:
+            meter.create_counter("demo_activity_retries", "Activity attempts after the first").add(1)
+
+        outcome = "failure"
+        started = time.monotonic()
+        try:
+            result = await super().execute_activity(input)
+            outcome = "success"
+            return result
+        finally:
+            meter.create_histogram_timedelta(
+                "demo_activity_duration", "Time an activity attempt takes to run", "duration"
+            ).record(timedelta(seconds=time.monotonic() - started), {"outcome": outcome})
+
+
+def record_token_usage(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """Count the tokens an LLM call consumed; call from inside the activity that made it."""
+    counter = activity.metric_meter().create_counter("demo_llm_tokens", "Tokens used by LLM calls")
+    workflow_type = activity.info().workflow_type
+    counter.add(prompt_tokens, {"model": model, "kind": "prompt", "workflow_type": workflow_type})
+    counter.add(completion_tokens, {"model": model, "kind": "completion", "workflow_type": workflow_type})
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """Count a response cache lookup; call from inside the activity that made it."""
+    activity.metric_meter().create_counter("demo_llm_cache_lookups", "LLM response cache lookups").add(
+        1, {"result": "hit" if hit else "miss"}
+    )
@@ -0,0 +1,45 @@
+"""The ``create_pdf`` Activity shared by the report demos.
+
+Rendering is CPU-bound, so it runs on its own executor instead of the Worker's
+event loop. ``PDF_EXECUTOR`` picks a pool of threads (``thread``, the default)
+or of processes (``process``), and ``PDF_MAX_WORKERS`` its size. The pool is
+created by the first ``create_pdf`` call, never at import, so the processes it
+spawns don't each build a pool of their own.
+
+This module doesn't import litellm, so ``pdf_worker.py``, which imports it, and
+the rendering processes spawned from it stay small.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+
+from common.report_models import PDFGenerationInput
+from common.report_rendering import render_pdf, warm_pdf_renderer
+from dotenv import load_dotenv
+from temporalio import activity
+
+load_dotenv(override=True)
+
+
+@functools.cache
+def pdf_executor_from_env() -> concurrent.futures.Executor:
+    if os.getenv("PDF_EXECUTOR", "thread") == "process":
+        # Rendering in separate processes scales with cores and never holds this process's GIL.
+        # Spawn rather than fork, since forking a running Worker copies its threads' locks.
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=int(os.getenv("PDF_MAX_WORKERS", str(os.cpu_count() or 1))),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_pdf_renderer,
+        )
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=int(os.getenv("PDF_MAX_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        thread_name_prefix="create_pdf",
+    )
+
+
+@activity.defn
+async def create_pdf(input: PDFGenerationInput) -> str:
+    return await asyncio.get_running_loop().run_in_executor(pdf_executor_from_env(), render_pdf, input)
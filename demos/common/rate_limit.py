@@ -0,0 +1,269 @@
+"""Client-side rate limiting and adaptive concurrency for the LLM activities.
+
+Two mechanisms keep a worker under its provider's limits:
+
+- Per-model token buckets for requests/minute and tokens/minute. Requests are
+  spaced out evenly instead of arriving in bursts. After each response, the
+  token bucket is corrected with the real usage. Set them with ``LLM_RPM`` and
+  ``LLM_TPM`` (0, the default, means unlimited).
+- An AIMD (additive increase, multiplicative decrease) limit on how many
+  activities the worker picks up at once. It grows by about one slot per round
+  of successful calls. It halves when the provider answers 429, or when a call
+  takes longer than ``LLM_LATENCY_TARGET`` seconds. Activities that don't fit
+  stay on the task queue instead of waiting inside their start-to-close timeout.
+  Enable it with ``ADAPTIVE_CONCURRENCY=on``. It starts at
+  ``ADAPTIVE_CONCURRENCY_INITIAL`` (default 10) and never exceeds
+  ``MAX_CONCURRENT_ACTIVITIES``.
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Sequence
+from dataclasses import dataclass
+from datetime import timedelta
+
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+from temporalio.worker import (
+    CustomSlotSupplier,
+    FixedSizeSlotSupplier,
+    SlotMarkUsedContext,
+    SlotPermit,
+    SlotReleaseContext,
+    SlotReserveContext,
+    WorkerTuner,
+)
+
+# How often an activity waiting for rate limit budget heartbeats, so the wait doesn't trip its heartbeat timeout
+BUDGET_HEARTBEAT_INTERVAL = 5.0
+
+
+class TokenBucket:
+    """Refills at ``per_minute / 60`` per second and holds at most one second's worth, so usage stays smooth."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # Waiters take turns, so they are released one at a time at the refill rate
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        async with self._lock:
+            self._refill()
+            # A request larger than the bucket waits for a full bucket and then goes into debt
+            needed = min(amount, self.capacity)
+            if self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+    def debit(self, amount: float) -> None:
+        """Adjust for usage discovered after the fact; a negative amount refunds an overestimate."""
+        self._refill()
+        self._tokens -= amount
+
+
+class RateLimiter:
+    """Requests/minute and tokens/minute buckets, one pair per model."""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0) -> None:
+        self._rpm = requests_per_minute
+        self._tpm = tokens_per_minute
+        self._buckets: dict[str, tuple[TokenBucket | None, TokenBucket | None]] = {}
+
+    def _for(self, model: str) -> tuple[TokenBucket | None, TokenBucket | None]:
+        if model not in self._buckets:
+            self._buckets[model] = (
+                TokenBucket(self._rpm) if self._rpm > 0 else None,
+                TokenBucket(self._tpm) if self._tpm > 0 else None,
+            )
+        return self._buckets[model]
+
+    async def acquire(self, model: str, estimated_tokens: int) -> None:
+        requests, tokens = self._for(model)
+        if requests is not None:
+            await requests.acquire()
+        if tokens is not None:
+            await tokens.acquire(estimated_tokens)
+
+    def record(self, model: str, estimated_tokens: int, total_tokens: int) -> None:
+        _, tokens = self._for(model)
+        if tokens is not None:
+            tokens.debit(total_tokens - estimated_tokens)
+
+
+class AdaptiveConcurrency(CustomSlotSupplier):
+    """AIMD activity slot supplier: the worker only polls for a task while fewer than ``limit`` are running."""
+
+    def __init__(
+        self,
+        *,
+        initial: int = 10,
+        minimum: int = 1,
+        maximum: int = 1000,
+        latency_target: float | None = None,
+        backoff: float = 0.5,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.limit = float(initial)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._latency_target = latency_target
+        self._backoff = backoff
+        # One burst of 429s should halve the limit once, not once per failed call
+        self._cooldown = cooldown
+        self._last_decrease = 0.0
+        self._in_use = 0
+        # release_slot can be called from the SDK's own threads, not just the event loop
+        self._lock = threading.Lock()
+
+    def _try_take(self) -> bool:
+        with self._lock:
+            if self._in_use >= int(self.limit):
+                return False
+            self._in_use += 1
+            return True
+
+    async def reserve_slot(self, ctx: SlotReserveContext) -> SlotPermit:  # noqa: ARG002
+        while not self._try_take():
+            await asyncio.sleep(0.05)
+        return SlotPermit()
+
+    def try_reserve_slot(self, ctx: SlotReserveContext) -> SlotPermit | None:  # noqa: ARG002
+        return SlotPermit() if self._try_take() else None
+
+    def mark_slot_used(self, ctx: SlotMarkUsedContext) -> None:
+        pass
+
+    def release_slot(self, ctx: SlotReleaseContext) -> None:  # noqa: ARG002
+        with self._lock:
+            self._in_use -= 1
+
+    def on_success(self, latency: float) -> None:
+        if self._latency_target is not None and latency > self._latency_target:
+            self.on_overload()
+            return
+        with self._lock:
+            self.limit = min(self._maximum, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self._cooldown:
+                self.limit = max(self._minimum, self.limit * self._backoff)
+                self._last_decrease = now
+
+
+@functools.cache
+def rate_limiter_from_env() -> RateLimiter:
+    return RateLimiter(float(os.getenv("LLM_RPM", "0")), float(os.getenv("LLM_TPM", "0")))
+
+
+@functools.cache
+def adaptive_concurrency_from_env() -> AdaptiveConcurrency | None:
+    if os.getenv("ADAPTIVE_CONCURRENCY", "off").lower() != "on":
+        return None
+    latency_target = os.getenv("LLM_LATENCY_TARGET")
+    return AdaptiveConcurrency(
+        initial=int(os.getenv("ADAPTIVE_CONCURRENCY_INITIAL", "10")),
+        maximum=int(os.getenv("MAX_CONCURRENT_ACTIVITIES", "1000")),
+        latency_target=float(latency_target) if latency_target else None,
+    )
+
+
+def worker_tuner_from_env() -> WorkerTuner | None:
+    """Return a tuner that applies adaptive concurrency to activity slots, or None to use a fixed limit."""
+    concurrency = adaptive_concurrency_from_env()
+    if concurrency is None:
+        return None
+    return WorkerTuner.create_composite(
+        workflow_supplier=FixedSizeSlotSupplier(100),
+        activity_supplier=concurrency,
+        local_activity_supplier=FixedSizeSlotSupplier(100),
+    )
+
+
+@dataclass
+class LLMRequest:
+    model: str
+    estimated_tokens: int
+    # Set from the response's usage once it arrives, to correct the tokens/minute bucket
+    total_tokens: int | None = None
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def _heartbeating(wait: Awaitable[None], details: Sequence[object]) -> None:
+    """Await ``wait``, heartbeating ``details`` every ``BUDGET_HEARTBEAT_INTERVAL`` seconds until it finishes."""
+    waiting = asyncio.ensure_future(wait)
+    try:
+        while not (await asyncio.wait({waiting}, timeout=BUDGET_HEARTBEAT_INTERVAL))[0]:
+            activity.heartbeat(*details)
+        waiting.result()
+    finally:
+        waiting.cancel()
+
+
+@contextlib.asynccontextmanager
+async def throttled(
+    model: str, estimated_tokens: int, *, heartbeat_details: Sequence[object] | None = None
+) -> AsyncIterator[LLMRequest]:
+    """Wait for rate limit budget, then feed the call's outcome back into the limiter and the AIMD limit.
+
+    Pass ``heartbeat_details`` from an activity with a heartbeat timeout. The
+    wait for budget then heartbeats them, since it can be longer than the
+    timeout once the token bucket is in debt.
+
+    A 429 that carries a Retry-After header is re-raised as an ApplicationError
+    with ``next_retry_delay``. Temporal then retries when the provider says to,
+    not on its fixed backoff schedule.
+    """
+    limiter = rate_limiter_from_env()
+    concurrency = adaptive_concurrency_from_env()
+    if heartbeat_details is None:
+        await limiter.acquire(model, estimated_tokens)
+    else:
+        await _heartbeating(limiter.acquire(model, estimated_tokens), heartbeat_details)
+
+    request = LLMRequest(model, estimated_tokens)
+    started = time.monotonic()
+    try:
+        yield request
+    except Exception as e:
+        if getattr(e, "status_code", None) != 429:
+            raise
+        if concurrency is not None:
+            concurrency.on_overload()
+        if (delay := _retry_after(e)) is None:
+            raise
+        raise ApplicationError(
+            f"{model} is rate limited", type="RateLimited", next_retry_delay=timedelta(seconds=delay)
+        ) from e
+
+    if concurrency is not None:
+        concurrency.on_success(time.monotonic() - started)
+    if request.total_tokens is not None:
+        limiter.record(model, estimated_tokens, request.total_tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the tokens in ``text`` (about 4 characters per token)."""
+    return len(text) // 4 + 1
@@ -0,0 +1,160 @@
+"""LLM Activities shared by the report demos (module_one_02 and module_one_03).
+
+- ``llm_call`` answers a prompt in one request. It goes through the response
+  cache, the per-model rate limiter and the provider router.
+- ``stream_llm_call`` streams the answer instead. It heartbeats the text
+  received so far, so a retry continues from there, and signals it to the
+  workflow for its partial-result query.
+
+``create_pdf`` is in ``common.pdf_activities``.
+"""
+
+import json
+import os
+import time
+from typing import cast
+
+from common.llm_cache import cache_from_env, cache_key
+from common.llm_routing import LLMProvider, llm_router_from_env
+from common.metrics import record_cache_lookup, record_token_usage
+from common.rate_limit import estimate_tokens, throttled
+from common.report_models import LLMCallInput, LLMCallResult, ResearchProgress, TokenUsage
+from dotenv import load_dotenv
+from litellm import acompletion
+from litellm.types.utils import Choices, ModelResponse, Usage
+from temporalio import activity
+
+load_dotenv(override=True)
+
+LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+
+# Optional response cache in front of the model, selected with the LLM_CACHE environment variable
+RESPONSE_CACHE = cache_from_env()
+
+# Minimum number of seconds between partial results sent back to the workflow while streaming
+STREAM_PROGRESS_INTERVAL = 1.0
+CONTINUE_PROMPT = "Continue exactly where you left off. Do not repeat any of the text you have already written."
+
+
+def _cached_response(key: str) -> ModelResponse | None:
+    if RESPONSE_CACHE is None:
+        return None
+    cached = RESPONSE_CACHE.get(key)
+    record_cache_lookup(cached is not None)
+    if cached is None:
+        return None
+    activity.logger.info(f"LLM response cache hit ({RESPONSE_CACHE.stats})")
+    return ModelResponse(**json.loads(cached))
+
+
+def _store_response(key: str, response: ModelResponse) -> None:
+    if RESPONSE_CACHE:
+        RESPONSE_CACHE.set(key, response.model_dump_json())
+
+
+def _to_result(response: ModelResponse, include_raw: bool) -> LLMCallResult:
+    # Non-streaming responses always hold Choices, never StreamingChoices
+    choice = cast("Choices", response.choices[0])
+    usage = getattr(response, "usage", None)
+    return LLMCallResult(
+        content=choice.message.content or "",
+        finish_reason=choice.finish_reason,
+        usage=TokenUsage(
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            total_tokens=usage.total_tokens,
+        )
+        if usage
+        else TokenUsage(),
+        raw=response.model_dump() if include_raw else None,
+    )
+
+
+@activity.defn
+async def llm_call(input: LLMCallInput) -> LLMCallResult:
+    key = cache_key(LLM_MODEL, input)
+    if (cached := _cached_response(key)) is not None:
+        return _to_result(cached, input.include_raw)
+
+    async def complete(provider: LLMProvider) -> tuple[LLMProvider, ModelResponse]:
+        async with throttled(provider.model, estimate_tokens(input.prompt)) as request:
+            response = await acompletion(
+                model=provider.model,
+                api_key=provider.api_key,
+                messages=[{"content": input.prompt, "role": "user"}],
+            )
+            if usage := getattr(response, "usage", None):
+                request.total_tokens = usage.total_tokens
+                record_token_usage(provider.model, usage.prompt_tokens, usage.completion_tokens)
+        # Without stream=True, acompletion returns a ModelResponse
+        return provider, cast("ModelResponse", response)
+
+    # Hedged across LLM_MODEL and LLM_FALLBACK_MODELS, when fallbacks are configured
+    provider, response = await llm_router_from_env().call(complete)
+    # The key is LLM_MODEL's, so a fallback model's answer isn't cached as if LLM_MODEL had given it
+    if provider.model == LLM_MODEL:
+        _store_response(key, response)
+    return _to_result(response, input.include_raw)
+
+
+@activity.defn
+async def stream_llm_call(input: LLMCallInput) -> LLMCallResult:
+    key = cache_key(LLM_MODEL, input)
+    if (cached := _cached_response(key)) is not None:
+        return _to_result(cached, input.include_raw)
+
+    info = activity.info()
+    messages = [{"content": input.prompt, "role": "user"}]
+
+    # A previous attempt heartbeated the text it had already received, so ask the model to continue from there
+    text: str = info.heartbeat_details[0] if info.heartbeat_details else ""
+    if text:
+        messages += [
+            {"content": text, "role": "assistant"},
+            {"content": CONTINUE_PROMPT, "role": "user"},
+        ]
+
+    handle = activity.client().get_workflow_handle(info.workflow_id)
+    sent = 0
+    last_sent_at = 0.0
+    finish_reason = "stop"
+    usage: Usage | None = None
+
+    # Heartbeat the resume text while waiting for budget, so a long wait doesn't time the attempt out
+    async with throttled(LLM_MODEL, estimate_tokens(input.prompt + text), heartbeat_details=(text,)) as request:
+        stream = await acompletion(
+            model=LLM_MODEL,
+            api_key=LLM_API_KEY,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            if not choice.delta.content:
+                continue
+
+            text += choice.delta.content
+            activity.heartbeat(text)
+
+            # Send what has arrived since the last update so the workflow can serve it from its query
+            if time.monotonic() - last_sent_at >= STREAM_PROGRESS_INTERVAL:
+                await handle.signal("research_progress_signal", ResearchProgress(offset=sent, text=text[sent:]))
+                sent = len(text)
+                last_sent_at = time.monotonic()
+        if usage:
+            request.total_tokens = usage.total_tokens
+            record_token_usage(LLM_MODEL, usage.prompt_tokens, usage.completion_tokens)
+
+    response = ModelResponse(
+        model=LLM_MODEL,
+        choices=[{"index": 0, "finish_reason": finish_reason, "message": {"content": text, "role": "assistant"}}],
+        usage=usage,
+    )
+    _store_response(key, response)
+    return _to_result(response, input.include_raw)
@@ -0,0 +1,51 @@
+"""Inputs and results of the report Activities in ``common.report_activities``.
+
+Both report demos import these through their own ``models`` module.
+"""
+
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+
+class PDFOutput(StrEnum):
+    # Write to PDFGenerationInput.filename in the worker's working directory
+    FILE = "FILE"
+    # Render in memory and store in the blob sink selected by PDF_SINK, named by content hash
+    BLOB = "BLOB"
+
+
+@dataclass
+class LLMCallInput:
+    prompt: str
+    # The full litellm response is large and ends up in workflow history, so only return it when asked
+    include_raw: bool = False
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+@dataclass
+class LLMCallResult:
+    content: str
+    finish_reason: str | None = None
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    raw: dict[str, object] | None = None
+
+
+@dataclass
+class ResearchProgress:
+    offset: int
+    text: str
+
+
+@dataclass
+class PDFGenerationInput:
+    content: str
+    filename: str = "research_pdf.pdf"
+    # One of common.report_rendering.REPORT_TEMPLATES
+    report_type: str = "research"
+    output: PDFOutput = PDFOutput.FILE
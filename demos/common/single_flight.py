@@ -0,0 +1,62 @@
+"""Coalesce identical concurrent async calls onto one upstream request.
+
+When many activities on a worker ask for the same thing at once (e.g. weather
+alerts for one state during a storm), only the first call goes upstream. The
+others await its result. Results can also be kept for a short TTL, so calls that
+arrive just after the first one finishes are answered without a request.
+Failures are shared with every waiter but never cached.
+"""
+
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+
+
+class SingleFlight[T]:
+    """Single-flight group with an optional TTL cache, for use on one event loop."""
+
+    def __init__(self, ttl: float = 0.0, max_entries: int = 1024) -> None:
+        self.stats = SingleFlightStats()
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._results: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future[T]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``fn()``, shared with any concurrent or recent call made with the same ``key``."""
+        entry = self._results.get(key)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self.stats.cache_hits += 1
+                return entry[1]
+            del self._results[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(functools.partial(self._finish, key))
+        # Shield the shared call so one cancelled caller doesn't cancel it for everyone else
+        return await asyncio.shield(future)
+
+    def _finish(self, key: str, future: asyncio.Future[T]) -> None:
+        del self._in_flight[key]
+        # Checking exception() also marks it retrieved if every caller was cancelled
+        if future.cancelled() or future.exception() is not None or self._ttl <= 0:
+            return
+        self._results[key] = (time.monotonic() + self._ttl, future.result())
+        while len(self._results) > self._max_entries:
+            self._results.popitem(last=False)
@@ -0,0 +1,285 @@
+"""HTTP gateway that submits and tracks demo Workflows through one long-lived Temporal Client.
+
+Each starter script connects to Temporal, starts one Workflow and exits, so
+every request pays for a new gRPC connection. The gateway connects once at
+startup. Every request then goes over that Client's single multiplexed
+connection:
+
+- ``POST /reports``: start a ``GenerateReportWorkflow``. The JSON body holds
+  ``GenerateReportInput`` fields (``prompt`` is required); pass ``id`` to choose
+  the Workflow ID. Fields that aren't in ``REPORT_FIELDS``, or have the wrong
+  type, get a 400. So does the state that continue-as-new carries over.
+  ``config`` only applies to module 2. Module 3's Workflow ignores it and
+  keeps its own timeouts.
+- ``POST /agent``: start an ``AgentWorkflow`` for ``{"query": ...}``.
+- ``POST /batch``: start many at once, from
+  ``{"reports": [...], "agent": [...]}``. Returns one entry per item, in order,
+  holding either the Workflow ID or the error.
+- ``POST /workflows/{id}/decision``: send the Human in the Loop decision,
+  ``{"decision": "KEEP" | "EDIT", "additional_prompt": ...}``.
+- ``GET /workflows/{id}/draft``: the report's current draft, from the
+  ``get_research_result`` Query.
+- ``GET /workflows/{id}``: the Workflow's status, plus its result once it has
+  completed. Add ``?wait=true`` to wait for the result.
+
+Workflows are started by type name, so the gateway doesn't import any demo's
+code. The Workers must be running: ``REPORT_TASK_QUEUE`` (default ``durable``)
+for reports and ``AGENT_TASK_QUEUE`` (default ``agent-python-task-queue``) for
+agent queries. Modules 2 and 3 both register ``GenerateReportWorkflow`` on
+``durable``, so reports go to whichever of their Workers is running. Run only
+one of them. The decision and draft endpoints need module 3's Worker. ``TEMPORAL_ADDRESS`` and ``TEMPORAL_NAMESPACE`` choose the
+server, ``GATEWAY_PORT`` (default 8000) the port, and ``GATEWAY_MAX_STARTS``
+(default 100) how many start requests a batch sends at once.
+
+Run it with ``uv run demos/gateway/server.py``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import uuid
+from collections.abc import AsyncIterator, Awaitable
+from pathlib import Path
+
+from aiohttp import web
+from temporalio.client import Client, WorkflowExecutionStatus, WorkflowFailureError
+from temporalio.service import RPCError, RPCStatusCode
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.metrics import runtime_from_env
+
+TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
+TEMPORAL_NAMESPACE = os.getenv("TEMPORAL_NAMESPACE", "default")
+REPORT_TASK_QUEUE = os.getenv("REPORT_TASK_QUEUE", "durable")
+AGENT_TASK_QUEUE = os.getenv("AGENT_TASK_QUEUE", "agent-python-task-queue")
+GATEWAY_PORT = int(os.getenv("GATEWAY_PORT", "8000"))
+GATEWAY_MAX_STARTS = int(os.getenv("GATEWAY_MAX_STARTS", "100"))
+
+CLIENT = web.AppKey("client", Client)
+START_SLOTS = web.AppKey("start_slots", asyncio.Semaphore)
+
+# RPC failures the caller can fix, and the HTTP status to answer them with
+RPC_HTTP_STATUS = {
+    RPCStatusCode.ALREADY_EXISTS: 409,
+    RPCStatusCode.NOT_FOUND: 404,
+    RPCStatusCode.INVALID_ARGUMENT: 400,
+    RPCStatusCode.FAILED_PRECONDITION: 409,
+}
+
+type JSONObject = dict[str, object]
+
+# The GenerateReportInput fields a request may set, and the JSON types each one takes. Module 2's and
+# module 3's Workflows each ignore the fields only the other has
+REPORT_FIELDS: dict[str, tuple[type, ...]] = {
+    "prompt": (str,),
+    "llm_image_model": (str,),
+    "stream": (bool,),
+    "pdf_task_queue": (str, type(None)),
+    "pdf_output": (str,),
+    "speculative_pdf": (bool,),
+    "config": (dict, type(None)),
+    "sections": (bool,),
+    "max_sections": (int,),
+    "smooth": (bool,),
+}
+PDF_OUTPUTS = {"FILE", "BLOB"}
+# Module 2's ReportConfig fields, which are all numbers. Module 3 has no ReportConfig and ignores config
+REPORT_CONFIG_FIELDS = {
+    "demo_pause_seconds",
+    "llm_timeout_seconds",
+    "stream_timeout_seconds",
+    "heartbeat_timeout_seconds",
+    "pdf_timeout_seconds",
+    "retry_initial_interval_seconds",
+    "llm_max_attempts",
+    "pdf_max_attempts",
+}
+# Review state that module 3 carries over by continue-as-new. A request setting it would skip or forge drafts
+CARRIED_OVER_FIELDS = {"research_result", "edit_count", "draft_number", "pending_decision"}
+JSON_TYPE_NAMES = {str: "a string", bool: "a boolean", int: "an integer", float: "a number", dict: "an object"}
+
+
+async def temporal_client(app: web.Application) -> AsyncIterator[None]:
+    # One Client for the life of the process; it is safe to share across concurrent requests
+    app[CLIENT] = await Client.connect(TEMPORAL_ADDRESS, namespace=TEMPORAL_NAMESPACE, runtime=runtime_from_env())
+    app[START_SLOTS] = asyncio.Semaphore(GATEWAY_MAX_STARTS)
+    yield
+
+
+def bad_request(message: str) -> web.HTTPBadRequest:
+    return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+
+
+async def json_body(request: web.Request) -> JSONObject:
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise bad_request("Request body must be JSON") from e
+    if not isinstance(body, dict):
+        raise bad_request("Request body must be a JSON object")
+    return body
+
+
+def has_json_type(value: object, types: tuple[type, ...]) -> bool:
+    # JSON booleans are Python bools, which are also ints
+    if isinstance(value, bool):
+        return bool in types
+    return isinstance(value, types)
+
+
+def type_names(types: tuple[type, ...]) -> str:
+    return " or ".join(JSON_TYPE_NAMES.get(t, "null") for t in types)
+
+
+def report_input(body: JSONObject) -> JSONObject:
+    """The ``GenerateReportInput`` fields of a ``POST /reports`` body; raises ``ValueError`` for any that aren't allowed."""
+    fields = {key: value for key, value in body.items() if key != "id"}
+    for key, value in fields.items():
+        if key in CARRIED_OVER_FIELDS:
+            raise ValueError(f"{key} is set by the workflow, not by requests")
+        if key not in REPORT_FIELDS:
+            raise ValueError(f"unknown field: {key}")
+        if not has_json_type(value, REPORT_FIELDS[key]):
+            raise ValueError(f"{key} must be {type_names(REPORT_FIELDS[key])}")
+    if not fields.get("prompt"):
+        raise ValueError("prompt is required")
+    if "pdf_output" in fields and fields["pdf_output"] not in PDF_OUTPUTS:
+        raise ValueError(f"pdf_output must be one of {', '.join(sorted(PDF_OUTPUTS))}")
+    if isinstance(config := fields.get("config"), dict):
+        for key, value in config.items():
+            if key not in REPORT_CONFIG_FIELDS:
+                raise ValueError(f"unknown config field: {key}")
+            if not has_json_type(value, (int, float)):
+                raise ValueError(f"config.{key} must be a number")
+    return fields
+
+
+def rpc_error_response(error: RPCError) -> web.Response:
+    return web.json_response({"error": error.message}, status=RPC_HTTP_STATUS.get(error.status, 502))
+
+
+async def start_report(app: web.Application, body: JSONObject) -> str:
+    fields = report_input(body)
+    if not has_json_type(body.get("id"), (str, type(None))):
+        raise ValueError("id must be a string")
+    workflow_id = str(body.get("id") or f"generate-research-report-workflow-{uuid.uuid4()}")
+    async with app[START_SLOTS]:
+        await app[CLIENT].start_workflow("GenerateReportWorkflow", fields, id=workflow_id, task_queue=REPORT_TASK_QUEUE)
+    return workflow_id
+
+
+async def start_agent(app: web.Application, body: JSONObject) -> str:
+    if not isinstance(body.get("query"), str) or not body["query"]:
+        raise ValueError("query is required")
+    workflow_id = str(body.get("id") or f"agent-workflow-{uuid.uuid4()}")
+    async with app[START_SLOTS]:
+        await app[CLIENT].start_workflow("AgentWorkflow", body["query"], id=workflow_id, task_queue=AGENT_TASK_QUEUE)
+    return workflow_id
+
+
+async def started(start: Awaitable[str]) -> web.Response:
+    try:
+        workflow_id = await start
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except RPCError as e:
+        return rpc_error_response(e)
+    return web.json_response({"workflow_id": workflow_id}, status=202)
+
+
+async def submit_report(request: web.Request) -> web.Response:
+    return await started(start_report(request.app, await json_body(request)))
+
+
+async def submit_agent_query(request: web.Request) -> web.Response:
+    return await started(start_agent(request.app, await json_body(request)))
+
+
+async def submit_batch(request: web.Request) -> web.Response:
+    body = await json_body(request)
+    reports, agent = body.get("reports", []), body.get("agent", [])
+    if not isinstance(reports, list) or not isinstance(agent, list):
+        raise bad_request("reports and agent must be lists")
+
+    async def start(kind: str, item: object) -> JSONObject:
+        if not isinstance(item, dict):
+            return {"error": "each item must be a JSON object"}
+        try:
+            if kind == "reports":
+                return {"workflow_id": await start_report(request.app, item)}
+            return {"workflow_id": await start_agent(request.app, item)}
+        except ValueError as e:
+            return {"error": str(e)}
+        except RPCError as e:
+            return {"error": e.message}
+
+    # All starts share the one Client; GATEWAY_MAX_STARTS bounds how many are in flight together
+    report_results, agent_results = await asyncio.gather(
+        asyncio.gather(*(start("reports", item) for item in reports)),
+        asyncio.gather(*(start("agent", item) for item in agent)),
+    )
+    return web.json_response({"reports": report_results, "agent": agent_results}, status=202)
+
+
+async def send_decision(request: web.Request) -> web.Response:
+    body = await json_body(request)
+    decision = str(body.get("decision", "")).upper()
+    if decision not in {"KEEP", "EDIT"}:
+        raise bad_request("decision must be KEEP or EDIT")
+    handle = request.app[CLIENT].get_workflow_handle(request.match_info["workflow_id"])
+    try:
+        await handle.signal(
+            "user_decision_signal",
+            {"decision": decision, "additional_prompt": str(body.get("additional_prompt", ""))},
+        )
+    except RPCError as e:
+        return rpc_error_response(e)
+    return web.json_response({"workflow_id": handle.id, "decision": decision}, status=202)
+
+
+async def get_draft(request: web.Request) -> web.Response:
+    handle = request.app[CLIENT].get_workflow_handle(request.match_info["workflow_id"])
+    try:
+        draft = await handle.query("get_research_result")
+    except RPCError as e:
+        return rpc_error_response(e)
+    return web.json_response({"workflow_id": handle.id, "draft": draft})
+
+
+async def get_workflow(request: web.Request) -> web.Response:
+    handle = request.app[CLIENT].get_workflow_handle(request.match_info["workflow_id"])
+    try:
+        if request.query.get("wait", "").lower() not in {"1", "true"}:
+            status = (await handle.describe()).status
+            if status != WorkflowExecutionStatus.COMPLETED:
+                return web.json_response({"workflow_id": handle.id, "status": status.name if status else None})
+        # handle.result() follows continue-as-new and waits for the final run
+        result = await handle.result()
+    except WorkflowFailureError as e:
+        return web.json_response({"workflow_id": handle.id, "status": "FAILED", "error": str(e.cause or e)})
+    except RPCError as e:
+        return rpc_error_response(e)
+    return web.json_response({"workflow_id": handle.id, "status": "COMPLETED", "result": result})
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.cleanup_ctx.append(temporal_client)
+    app.add_routes(
+        [
+            web.post("/reports", submit_report),
+            web.post("/agent", submit_agent_query),
+            web.post("/batch", submit_batch),
+            web.post("/workflows/{workflow_id}/decision", send_decision),
+            web.get("/workflows/{workflow_id}/draft", get_draft),
+            web.get("/workflows/{workflow_id}", get_workflow),
+        ]
+    )
+    return app
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(create_app(), port=GATEWAY_PORT)
@@ -1,18 +1,22 @@
 import os
+import sys
 import time
+from pathlib import Path
 
 from dotenv import load_dotenv
 from litellm import completion
 from litellm.types.utils import ModelResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.report_rendering import render_report
 
 load_dotenv(override=True)
 
 # Get LLM_API_KEY environment variable
 LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o")
 LLM_API_KEY = os.getenv("LLM_API_KEY", None)
+# Seconds to count down before creating the PDF, so the demo has time to kill the process; 0 skips it
+DEMO_PAUSE_SECONDS = float(os.getenv("DEMO_PAUSE_SECONDS", "0"))
 
 
 def llm_call(prompt: str) -> ModelResponse:
@@ -24,30 +28,7 @@ def llm_call(prompt: str) -> ModelResponse:
 
 
 def create_pdf(content: str, filename: str = "research_report.pdf") -> str:
-    doc = SimpleDocTemplate(filename, pagesize=letter)
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=1,
-    )
-
-    story: list[Flowable] = []
-    title = Paragraph("Research Report", title_style)
-    story.append(title)
-    story.append(Spacer(1, 20))
-
-    paragraphs = content.split("\n\n")
-    for para in paragraphs:
-        if para.strip():
-            p = Paragraph(para.strip(), styles["Normal"])
-            story.append(p)
-            story.append(Spacer(1, 12))
-
-    doc.build(story)
+    render_report(content, filename)
     return filename
 
 
@@ -70,8 +51,9 @@ print("Research complete!")
 # print("Press Ctrl+C within the next 15 seconds to simulate a process crash.")
 # print("Then restart the script to see how you lose all progress...")
 
-# Long pause to allow killing the process
-for i in range(15, 0, -1):
+# Long pause to allow killing the process. Any fraction of a second is slept first, so the countdown ticks in whole seconds
+time.sleep(DEMO_PAUSE_SECONDS % 1)
+for i in range(int(DEMO_PAUSE_SECONDS), 0, -1):
     print(f"Continuing in {i} seconds... (Press Ctrl+C to kill process)")
     time.sleep(1)
 
@@ -1,51 +1,55 @@
 import os
-from dotenv import load_dotenv
-from litellm import completion
-from litellm.types.utils import ModelResponse
-from models import LLMCallInput, PDFGenerationInput
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer
+import re
+import sys
+from pathlib import Path
+from models import LLMCallInput, OutlineInput, ReportConfig, ReportOutline
 from temporalio import activity
 
-load_dotenv(override=True)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.pdf_activities import create_pdf
+from common.report_activities import llm_call, stream_llm_call
+
+# The LLM and PDF Activities are shared with module_one_03_human_in_the_loop
+__all__ = ["create_outline", "create_pdf", "llm_call", "report_config_defaults", "stream_llm_call"]
+
+def report_config_from_env() -> ReportConfig:
+    defaults = ReportConfig()
+    return ReportConfig(
+        demo_pause_seconds=float(os.getenv("DEMO_PAUSE_SECONDS", str(defaults.demo_pause_seconds))),
+        llm_timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", str(defaults.llm_timeout_seconds))),
+        stream_timeout_seconds=float(os.getenv("STREAM_TIMEOUT_SECONDS", str(defaults.stream_timeout_seconds))),
+        heartbeat_timeout_seconds=float(os.getenv("HEARTBEAT_TIMEOUT_SECONDS", str(defaults.heartbeat_timeout_seconds))),
+        pdf_timeout_seconds=float(os.getenv("PDF_TIMEOUT_SECONDS", str(defaults.pdf_timeout_seconds))),
+        retry_initial_interval_seconds=float(
+            os.getenv("RETRY_INITIAL_INTERVAL_SECONDS", str(defaults.retry_initial_interval_seconds))
+        ),
+        llm_max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", str(defaults.llm_max_attempts))),
+        pdf_max_attempts=int(os.getenv("PDF_MAX_ATTEMPTS", str(defaults.pdf_max_attempts))),
+    )
 
-# Get LLM_API_KEY environment variable
-LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o")
-LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+REPORT_CONFIG = report_config_from_env()
 
 @activity.defn
-def llm_call(input: LLMCallInput) -> ModelResponse:
-    return completion(
-        model=LLM_MODEL,
-        api_key=LLM_API_KEY,
-        messages=[{"content": input.prompt, "role": "user"}],
-    )
+async def report_config_defaults() -> ReportConfig:
+    # Run as a local activity, so the Worker's defaults are recorded in history and replay doesn't depend on its env
+    return REPORT_CONFIG
+
+OUTLINE_PROMPT = (
+    "Plan a research report answering the request below. Reply with the titles of its sections only, "
+    "one per line, in order, with no numbering or other text. Use at most {max_sections} sections.\n\n"
+    "Request: {prompt}"
+)
+# Numbering, bullets and heading markers the model adds despite being asked not to
+OUTLINE_MARKER = re.compile(r"^\s*(?:(?:#+|[-*+]|\d+[.)]|section\s+\d+[.:])\s*)+", re.IGNORECASE)
 
 @activity.defn
-def create_pdf(input: PDFGenerationInput) -> str:
-    doc = SimpleDocTemplate(input.filename, pagesize=letter)
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=1,
+async def create_outline(input: OutlineInput) -> ReportOutline:
+    result = await llm_call(
+        LLMCallInput(prompt=OUTLINE_PROMPT.format(prompt=input.prompt, max_sections=input.max_sections))
     )
-
-    story: list[Flowable] = []
-    title = Paragraph("Research Report", title_style)
-    story.append(title)
-    story.append(Spacer(1, 20))
-
-    paragraphs = input.content.split("\n\n")
-    for para in paragraphs:
-        if para.strip():
-            p = Paragraph(para.strip(), styles["Normal"])
-            story.append(p)
-            story.append(Spacer(1, 12))
-
-    doc.build(story)
-    return input.filename
+    titles = [title for line in result.content.splitlines() if (title := OUTLINE_MARKER.sub("", line).strip(" *"))]
+    # Skip a preamble such as "Here is the outline:", but keep a later title like "Conclusion:"
+    if titles and titles[0].endswith(":"):
+        titles = titles[1:]
+    # A reply with no usable titles still gets a report, written as a single section
+    return ReportOutline(sections=titles[: input.max_sections] or [input.prompt])
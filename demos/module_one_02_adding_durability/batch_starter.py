@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import os
+import uuid
+from pathlib import Path
+
+from models import BatchReportInput, BatchReportOutput, PDFOutput
+from temporalio.client import Client
+from workflow import BatchReportWorkflow
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a research report for every prompt in a file.")
+    parser.add_argument("prompts_file", type=Path, help="text file with one prompt per line")
+    parser.add_argument("--max-in-flight", type=int, default=10, help="report workflows running at once per batch")
+    parser.add_argument("--batch-size", type=int, default=500, help="prompts per batch workflow")
+    parser.add_argument("--sections", action="store_true", help="write each report's sections in parallel")
+    args = parser.parse_args()
+
+    prompts = [line.strip() for line in args.prompts_file.read_text().splitlines() if line.strip()]
+
+    # One connection for the whole run, however many batches it starts
+    client = await Client.connect("localhost:7233")
+
+    # Each batch workflow's history grows with its children, so very large runs are split across several batches
+    batch_id = uuid.uuid4()
+    handles = []
+    for start in range(0, len(prompts), args.batch_size):
+        handle = await client.start_workflow(
+            BatchReportWorkflow.run,
+            BatchReportInput(
+                prompts=prompts[start : start + args.batch_size],
+                max_in_flight=args.max_in_flight,
+                pdf_task_queue=os.getenv("PDF_TASK_QUEUE"),
+                pdf_output=PDFOutput(os.getenv("PDF_OUTPUT", "blob").upper()),
+                sections=args.sections,
+            ),
+            id=f"batch-report-workflow-{batch_id}-{start // args.batch_size}",
+            task_queue="durable",
+        )
+        handles.append(handle)
+        print(f"Started batch workflow {handle.id} with {len(prompts[start : start + args.batch_size])} prompts")
+
+    outputs: list[BatchReportOutput] = await asyncio.gather(*(handle.result() for handle in handles))
+
+    succeeded = sum(output.succeeded for output in outputs)
+    failed = [report for output in outputs for report in output.reports if report.error is not None]
+    print(f"\n{succeeded} reports created, {len(failed)} failed.")
+    for report in failed:
+        print(f"FAILED: {report.prompt!r}: {report.error}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,23 +1,104 @@
+import sys
 from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.report_models import (
+    LLMCallInput,
+    LLMCallResult,
+    PDFGenerationInput,
+    PDFOutput,
+    ResearchProgress,
+    TokenUsage,
+)
+
+# The report Activities' inputs and results are shared with module_one_03_human_in_the_loop
+__all__ = [
+    "BatchReportInput",
+    "BatchReportItem",
+    "BatchReportOutput",
+    "GenerateReportInput",
+    "GenerateReportOutput",
+    "LLMCallInput",
+    "LLMCallResult",
+    "OutlineInput",
+    "PDFGenerationInput",
+    "PDFOutput",
+    "ReportConfig",
+    "ReportOutline",
+    "ResearchProgress",
+    "TokenUsage",
+]
 
 
 @dataclass
-class LLMCallInput:
+class OutlineInput:
     prompt: str
+    max_sections: int = 12
+
+
+@dataclass
+class ReportOutline:
+    sections: list[str]
 
 
 @dataclass
-class PDFGenerationInput:
-    content: str
-    filename: str = "research_pdf.pdf"
+class ReportConfig:
+    # Pause between research and PDF, so the durability demo has time to kill the Worker; 0 skips it
+    demo_pause_seconds: float = 0
+    llm_timeout_seconds: float = 30
+    stream_timeout_seconds: float = 300
+    heartbeat_timeout_seconds: float = 15
+    pdf_timeout_seconds: float = 20
+    retry_initial_interval_seconds: float = 1
+    # 0 retries until the timeout, as Temporal does by default
+    llm_max_attempts: int = 0
+    pdf_max_attempts: int = 3
 
 
 @dataclass
 class GenerateReportInput:
     prompt: str
     llm_image_model: str = "dall-e-3"
+    stream: bool = False
+    # Task queue of a dedicated PDF worker (pdf_worker.py); None renders on the workflow's own task queue
+    pdf_task_queue: str | None = None
+    pdf_output: PDFOutput = PDFOutput.FILE
+    # None uses the Worker's defaults (report_config_from_env), recorded in history when the workflow starts
+    config: ReportConfig | None = None
+    # Outline the report first, then write every section in parallel (stream is ignored in this mode)
+    sections: bool = False
+    max_sections: int = 12
+    # Rewrite the assembled sections in one more LLM call so they read as a single report
+    smooth: bool = False
 
 
 @dataclass
 class GenerateReportOutput:
     result: str
+
+
+@dataclass
+class BatchReportInput:
+    prompts: list[str]
+    # Maximum number of report workflows running at once
+    max_in_flight: int = 10
+    pdf_task_queue: str | None = None
+    # Reports in a batch finish on the same workers, so write them to the blob sink rather than one shared filename
+    pdf_output: PDFOutput = PDFOutput.BLOB
+    config: ReportConfig | None = None
+    sections: bool = False
+
+
+@dataclass
+class BatchReportItem:
+    prompt: str
+    result: str | None = None
+    error: str | None = None
+
+
+@dataclass
+class BatchReportOutput:
+    succeeded: int
+    failed: int
+    reports: list[BatchReportItem]
@@ -1,6 +1,7 @@
 import asyncio
+import os
 import uuid
-from models import GenerateReportInput
+from models import GenerateReportInput, PDFOutput
 from temporalio.client import Client
 from workflow import GenerateReportWorkflow
 
@@ -14,7 +15,12 @@ async def main() -> None:
         prompt = "Give me 5 fun and fascinating facts about tardigrades. Make them interesting and educational!"
         print(f"No prompt entered. Using default: {prompt}")
 
-    research_input = GenerateReportInput(prompt=prompt)
+    research_input = GenerateReportInput(
+        prompt=prompt,
+        pdf_task_queue=os.getenv("PDF_TASK_QUEUE"),
+        pdf_output=PDFOutput(os.getenv("PDF_OUTPUT", "file").upper()),
+        sections=os.getenv("REPORT_SECTIONS", "off").lower() == "on",
+    )
 
     handle = await client.start_workflow(
         GenerateReportWorkflow,
@@ -1,48 +1,184 @@
+import asyncio
 from datetime import timedelta
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.exceptions import ChildWorkflowError
 
 with workflow.unsafe.imports_passed_through():
-    from activities import create_pdf, llm_call
+    from activities import create_outline, create_pdf, llm_call, report_config_defaults, stream_llm_call
     from models import (
+        BatchReportInput,
+        BatchReportItem,
+        BatchReportOutput,
         GenerateReportInput,
         GenerateReportOutput,
         LLMCallInput,
+        LLMCallResult,
+        OutlineInput,
         PDFGenerationInput,
+        ReportConfig,
+        ResearchProgress,
+        TokenUsage,
     )
 
+SECTION_PROMPT = (
+    "You are writing one section of a research report for this request: {prompt}\n\n"
+    "The report's sections are:\n{outline}\n\n"
+    'Write only the section "{title}". Do not repeat its title and do not cover the other sections.'
+)
+SMOOTH_PROMPT = (
+    "The research report below was written one section at a time. Edit it so it reads as one report: "
+    "smooth the transitions and remove repetition, but keep every section, its facts and its ## heading.\n\n"
+    "{report}"
+)
+
 
 @workflow.defn
 class GenerateReportWorkflow:
+    def __init__(self) -> None:
+        self._research_result: str | None = None
+        self._partial_result: str = ""
+
+    @workflow.signal
+    async def research_progress_signal(self, progress: ResearchProgress) -> None:
+        self._partial_result = self._partial_result[: progress.offset] + progress.text
+
+    @workflow.query
+    def get_research_result(self) -> str | None:
+        # While a streamed report is being generated, return what has arrived so far
+        if self._research_result is None and self._partial_result:
+            return self._partial_result
+        return self._research_result
+
     @workflow.run
     async def run(self, input: GenerateReportInput) -> GenerateReportOutput:
+        config = input.config
+        if config is None:
+            config = await workflow.execute_local_activity(
+                report_config_defaults, start_to_close_timeout=timedelta(seconds=5)
+            )
+
         llm_call_input = LLMCallInput(
             prompt=input.prompt,
         )
 
-        research_facts = await workflow.execute_activity(
-            llm_call,
-            llm_call_input,
-            start_to_close_timeout=timedelta(seconds=30),
-        )
+        if input.sections:
+            research_facts = await self._research_sections(input, config)
+        elif input.stream:
+            research_facts = await workflow.execute_activity(
+                stream_llm_call,
+                llm_call_input,
+                start_to_close_timeout=timedelta(seconds=config.stream_timeout_seconds),
+                heartbeat_timeout=timedelta(seconds=config.heartbeat_timeout_seconds),
+                retry_policy=_retry_policy(config, config.llm_max_attempts),
+            )
+        else:
+            research_facts = await workflow.execute_activity(
+                llm_call,
+                llm_call_input,
+                start_to_close_timeout=timedelta(seconds=config.llm_timeout_seconds),
+                retry_policy=_retry_policy(config, config.llm_max_attempts),
+            )
+        self._research_result = research_facts.content
 
-        print("Research complete! Time to generate PDF. Kill the Worker now to demonstrate durability.")
+        if config.demo_pause_seconds > 0:
+            print("Research complete! Time to generate PDF. Kill the Worker now to demonstrate durability.")
 
-        # Adding a delay for demo purposes so you have time to kill the Worker.
-        await workflow.sleep(timedelta(seconds=20))
+            # Adding a delay for demo purposes so you have time to kill the Worker.
+            await workflow.sleep(timedelta(seconds=config.demo_pause_seconds))
+        else:
+            print("Research complete! Generating PDF...")
 
-        pdf_generation_input = PDFGenerationInput(content=research_facts["choices"][0]["message"]["content"])
+        pdf_generation_input = PDFGenerationInput(content=self._research_result, output=input.pdf_output)
 
         pdf_filename: str = await workflow.execute_activity(
             create_pdf,
             pdf_generation_input,
-            start_to_close_timeout=timedelta(seconds=20),
-            retry_policy=RetryPolicy(
-                initial_interval=timedelta(seconds=1),
-                maximum_attempts=3,
-                backoff_coefficient=2.0,
-            ),
+            task_queue=input.pdf_task_queue,
+            start_to_close_timeout=timedelta(seconds=config.pdf_timeout_seconds),
+            retry_policy=_retry_policy(config, config.pdf_max_attempts),
         )
 
         return GenerateReportOutput(result=f"Successfully created research report PDF: {pdf_filename}")
+
+    async def _research_sections(self, input: GenerateReportInput, config: ReportConfig) -> LLMCallResult:
+        """Outline the report, write each section in parallel, then assemble (and optionally smooth) them."""
+        outline = await workflow.execute_activity(
+            create_outline,
+            OutlineInput(prompt=input.prompt, max_sections=input.max_sections),
+            start_to_close_timeout=timedelta(seconds=config.llm_timeout_seconds),
+            retry_policy=_retry_policy(config, config.llm_max_attempts),
+        )
+        print(f"Writing {len(outline.sections)} sections in parallel")
+
+        outline_text = "\n".join(f"- {title}" for title in outline.sections)
+        sections = await asyncio.gather(
+            *(
+                workflow.execute_activity(
+                    llm_call,
+                    LLMCallInput(prompt=SECTION_PROMPT.format(prompt=input.prompt, outline=outline_text, title=title)),
+                    start_to_close_timeout=timedelta(seconds=config.llm_timeout_seconds),
+                    retry_policy=_retry_policy(config, config.llm_max_attempts),
+                )
+                for title in outline.sections
+            )
+        )
+        report = "\n\n".join(
+            f"## {title}\n\n{section.content.strip()}"
+            for title, section in zip(outline.sections, sections, strict=True)
+        )
+        usage = TokenUsage(
+            prompt_tokens=sum(section.usage.prompt_tokens for section in sections),
+            completion_tokens=sum(section.usage.completion_tokens for section in sections),
+            total_tokens=sum(section.usage.total_tokens for section in sections),
+        )
+        if not input.smooth:
+            return LLMCallResult(content=report, usage=usage)
+
+        return await workflow.execute_activity(
+            llm_call,
+            LLMCallInput(prompt=SMOOTH_PROMPT.format(report=report)),
+            start_to_close_timeout=timedelta(seconds=config.stream_timeout_seconds),
+            retry_policy=_retry_policy(config, config.llm_max_attempts),
+        )
+
+
+def _retry_policy(config: ReportConfig, maximum_attempts: int) -> RetryPolicy:
+    return RetryPolicy(
+        initial_interval=timedelta(seconds=config.retry_initial_interval_seconds),
+        maximum_attempts=maximum_attempts,
+        backoff_coefficient=2.0,
+    )
+
+
+@workflow.defn
+class BatchReportWorkflow:
+    @workflow.run
+    async def run(self, input: BatchReportInput) -> BatchReportOutput:
+        # Bounds how many child report workflows run at once; the rest wait for a free slot
+        slots = asyncio.Semaphore(input.max_in_flight)
+
+        async def generate(index: int, prompt: str) -> BatchReportItem:
+            async with slots:
+                try:
+                    report = await workflow.execute_child_workflow(
+                        GenerateReportWorkflow.run,
+                        GenerateReportInput(
+                            prompt=prompt,
+                            pdf_task_queue=input.pdf_task_queue,
+                            pdf_output=input.pdf_output,
+                            config=input.config,
+                            sections=input.sections,
+                        ),
+                        id=f"{workflow.info().workflow_id}-report-{index}",
+                    )
+                except ChildWorkflowError as e:
+                    return BatchReportItem(prompt=prompt, error=str(e.cause or e))
+                return BatchReportItem(prompt=prompt, result=report.result)
+
+        reports = await asyncio.gather(*(generate(i, prompt) for i, prompt in enumerate(input.prompts)))
+
+        failed = sum(1 for report in reports if report.error is not None)
+        print(f"Batch complete: {len(reports) - failed} reports created, {failed} failed.")
+        return BatchReportOutput(succeeded=len(reports) - failed, failed=failed, reports=list(reports))
@@ -1,51 +1,9 @@
-import os
-from dotenv import load_dotenv
-from litellm import completion
-from litellm.types.utils import ModelResponse
-from models import LLMCallInput, PDFGenerationInput
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer
-from temporalio import activity
+import sys
+from pathlib import Path
 
-load_dotenv(override=True)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.pdf_activities import create_pdf
+from common.report_activities import llm_call, stream_llm_call
 
-# Get LLM_API_KEY environment variable
-LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o")
-LLM_API_KEY = os.getenv("LLM_API_KEY", "YOU-DIDNT-PROVIDE-A-KEY")
-
-@activity.defn
-def llm_call(input: LLMCallInput) -> ModelResponse:
-    return completion(
-        model=LLM_MODEL,
-        api_key=LLM_API_KEY,
-        messages=[{"content": input.prompt, "role": "user"}],
-    )
-
-@activity.defn
-def create_pdf(input: PDFGenerationInput) -> str:
-    doc = SimpleDocTemplate(input.filename, pagesize=letter)
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=1,
-    )
-
-    story: list[Flowable] = []
-    title = Paragraph("Research Report", title_style)
-    story.append(title)
-    story.append(Spacer(1, 20))
-
-    paragraphs = input.content.split("\n\n")
-    for para in paragraphs:
-        if para.strip():
-            p = Paragraph(para.strip(), styles["Normal"])
-            story.append(p)
-            story.append(Spacer(1, 12))
-
-    doc.build(story)
-    return input.filename
+# The LLM and PDF Activities are shared with module_one_02_adding_durability
+__all__ = ["create_pdf", "llm_call", "stream_llm_call"]
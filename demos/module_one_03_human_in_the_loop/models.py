@@ -1,5 +1,23 @@
+import sys
 from dataclasses import dataclass
 from enum import StrEnum
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.report_models import LLMCallInput, PDFGenerationInput, PDFOutput, ResearchProgress
+
+# The report Activities' inputs and results are shared with module_one_02_adding_durability
+__all__ = [
+    "Draft",
+    "GenerateReportInput",
+    "GenerateReportOutput",
+    "LLMCallInput",
+    "PDFGenerationInput",
+    "PDFOutput",
+    "ResearchProgress",
+    "UserDecision",
+    "UserDecisionSignal",
+]
 
 
 class UserDecision(StrEnum):
@@ -9,28 +27,35 @@ class UserDecision(StrEnum):
 
 
 @dataclass
-class LLMCallInput:
-    prompt: str
+class UserDecisionSignal:
+    decision: UserDecision
+    additional_prompt: str = ""
 
 
 @dataclass
-class PDFGenerationInput:
+class Draft:
+    # Increases by one with every draft written, including across continue-as-new
+    number: int
     content: str
-    filename: str = "research_pdf.pdf"
 
 
 @dataclass
 class GenerateReportInput:
     prompt: str
     llm_image_model: str = "dall-e-3"
+    stream: bool = False
+    # Task queue of a dedicated PDF worker (pdf_worker.py); None renders on the workflow's own task queue
+    pdf_task_queue: str | None = None
+    pdf_output: PDFOutput = PDFOutput.FILE
+    # Render the PDF of each draft while waiting for the user's decision, so KEEP doesn't wait for rendering
+    speculative_pdf: bool = False
+    # State carried over by continue-as-new during long edit sessions; leave unset when starting a report
+    research_result: str | None = None
+    edit_count: int = 0
+    draft_number: int = 0
+    pending_decision: UserDecisionSignal | None = None
 
 
 @dataclass
 class GenerateReportOutput:
     result: str
-
-
-@dataclass
-class UserDecisionSignal:
-    decision: UserDecision
-    additional_prompt: str = ""
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+# This Worker only renders PDFs, so default to a pool of processes, one per core
+os.environ.setdefault("PDF_EXECUTOR", "process")
+
+from temporalio.client import Client
+from temporalio.worker import Worker
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.metrics import MetricsInterceptor, runtime_from_env
+
+# Not from activities: the rendering processes re-import this script, so it must not pull in litellm
+from common.pdf_activities import create_pdf
+
+PDF_TASK_QUEUE = os.getenv("PDF_TASK_QUEUE", "durable-pdf")
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("temporalio").setLevel(logging.WARNING)
+
+    client = await Client.connect("localhost:7233", namespace="default", runtime=runtime_from_env())
+
+    # Keep a report queued for every rendering process so none of them sits idle between tasks
+    worker: Worker = Worker(
+        client,
+        task_queue=PDF_TASK_QUEUE,
+        activities=[create_pdf],
+        max_concurrent_activities=2 * int(os.getenv("PDF_MAX_WORKERS", str(os.cpu_count() or 1))),
+        interceptors=[MetricsInterceptor()],
+    )
+    logging.info(f"Starting the PDF worker on task queue {PDF_TASK_QUEUE}....")
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,15 @@
 import asyncio
+import os
 import uuid
 from dotenv import load_dotenv
-from models import GenerateReportInput, UserDecision, UserDecisionSignal
-from temporalio.client import Client
+from models import Draft, GenerateReportInput, GenerateReportOutput, PDFOutput, UserDecision, UserDecisionSignal
+from temporalio.client import Client, WithStartWorkflowOperation, WorkflowHandle, WorkflowUpdateFailedError
 from workflow import GenerateReportWorkflow
 from temporalio.common import WorkflowIDConflictPolicy
+from temporalio.exceptions import ApplicationError
+
+# Pause before asking again while the workflow hands over to a new run, which can take as long as a PDF render
+CONTINUE_AS_NEW_RETRY_SECONDS = 1.0
 
 async def main() -> None:
     client = await Client.connect("localhost:7233")
@@ -29,71 +34,75 @@ async def main() -> None:
             workflow_id = f"generate-research-report-workflow-{uuid.uuid4()}"
             print("Using provided prompt.")
 
-    handle = await client.start_workflow(
-        GenerateReportWorkflow,
-        GenerateReportInput(prompt=prompt),
+    # Start the workflow (or attach to a running one) and wait for its first draft in a single round trip
+    start_operation = WithStartWorkflowOperation(
+        GenerateReportWorkflow.run,
+        GenerateReportInput(
+            prompt=prompt,
+            stream=True,
+            pdf_task_queue=os.getenv("PDF_TASK_QUEUE"),
+            pdf_output=PDFOutput(os.getenv("PDF_OUTPUT", "file").upper()),
+            speculative_pdf=os.getenv("SPECULATIVE_PDF", "off").lower() == "on",
+        ),
         id=workflow_id,
         task_queue="durable",
-        id_conflict_policy=WorkflowIDConflictPolicy.USE_EXISTING
+        id_conflict_policy=WorkflowIDConflictPolicy.USE_EXISTING,
     )
+    print("Researching... the draft will appear here as soon as it's written.")
+    draft = await client.execute_update_with_start_workflow(
+        GenerateReportWorkflow.wait_for_draft, 0, start_workflow_operation=start_operation
+    )
+    started = await start_operation.workflow_handle()
+    print(f"Workflow ID: {started.id}, RunID {started.result_run_id}")
 
-    print(f"Workflow ID: {handle.id}, RunID {handle.result_run_id}")
-
-    signal_task = asyncio.create_task(send_user_decision_signal(client, handle.id))
+    # Address the workflow by ID only, so updates and signals follow it across continue-as-new
+    handle = client.get_workflow_handle_for(GenerateReportWorkflow.run, workflow_id)
 
     try:
+        await review_drafts(handle, draft)
         result = await handle.result()
-        signal_task.cancel()
         print(f"Result: {result}")
     except Exception as e:
-        signal_task.cancel()
         print(f"Workflow failed: {e}")
 
 
-async def query_research_result(client: Client, workflow_id: str) -> None:
-    handle = client.get_workflow_handle(workflow_id)
-
-    try:
-        research_result = await handle.query(GenerateReportWorkflow.get_research_result)
-        if research_result:
-            print(f"Research Result: {research_result}")
-        else:
-            print("Research Result: Not yet available")
-
-    except Exception as e:
-        print(f"Query failed: {e}")
-
+async def wait_for_next_draft(handle: WorkflowHandle[GenerateReportWorkflow, GenerateReportOutput], after: int) -> Draft:
+    while True:
+        try:
+            return await handle.execute_update(GenerateReportWorkflow.wait_for_draft, after)
+        except WorkflowUpdateFailedError as e:
+            # The run we were waiting on handed over to a new one; ask the new run instead
+            if isinstance(e.cause, ApplicationError) and e.cause.type == "ContinuedAsNew":
+                await asyncio.sleep(CONTINUE_AS_NEW_RETRY_SECONDS)
+                continue
+            raise
 
-async def send_user_decision_signal(client: Client, workflow_id: str) -> None:
-    handle = client.get_workflow_handle(workflow_id)
 
+async def review_drafts(handle: WorkflowHandle[GenerateReportWorkflow, GenerateReportOutput], draft: Draft) -> None:
     while True:
         print("\n" + "=" * 50)
-        print("Research is in progress! When it's complete you can choose one of the following options:")
-        print("1. Type 'query' to query for research result. If querying, wait for `Research Complete` to appear in terminal window with Worker running first.")
-        print("2. Type 'keep' to approve the research and create PDF")
-        print("3. Type 'edit' to modify the research")
+        print(f"Draft {draft.number}:\n\n{draft.content}")
         print("=" * 50)
+        print("1. Type 'keep' to approve the research and create PDF")
+        print("2. Type 'edit' to modify the research")
 
-        decision = input("Your decision (query/keep/edit): ").strip().lower()
+        decision = input("Your decision (keep/edit): ").strip().lower()
 
-        if decision in {"query", "1"}:
-            await query_research_result(client, workflow_id)
-        if decision in {"keep", "2"}:
+        if decision in {"keep", "1"}:
             signal_data = UserDecisionSignal(decision=UserDecision.KEEP)
             await handle.signal("user_decision_signal", signal_data)
             print("Signal sent to keep research and create PDF")
-            break
-        elif decision in {"edit", "3"}:
+            return
+        if decision in {"edit", "2"}:
             additional_prompt_input = input("Enter additional instructions for the research (optional): ").strip()
             additional_prompt = additional_prompt_input if additional_prompt_input else ""
 
             signal_data = UserDecisionSignal(decision=UserDecision.EDIT, additional_prompt=additional_prompt)
             await handle.signal("user_decision_signal", signal_data)
-            print("Signal sent to regenerate research")
-
+            print("Signal sent to regenerate research. Waiting for the new draft...")
+            draft = await wait_for_next_draft(handle, draft.number)
         else:
-            print("Please enter either 'keep', 'edit', or 'query'")
+            print("Please enter either 'keep' or 'edit'")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,21 @@
 import asyncio
-import concurrent.futures
 import logging
+import os
+import sys
 import warnings
+from pathlib import Path
 
-from activities import create_pdf, llm_call
+from activities import create_pdf, llm_call, stream_llm_call
 from temporalio.client import Client
 from temporalio.worker import Worker
 from workflow import GenerateReportWorkflow
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.metrics import MetricsInterceptor, runtime_from_env
+from common.rate_limit import worker_tuner_from_env
+
+MAX_CONCURRENT_ACTIVITIES = int(os.getenv("MAX_CONCURRENT_ACTIVITIES", "1000"))
+
 warnings.filterwarnings("ignore", message="If you're using Pydantic v2*")
 
 # Set logging levels to reduce verbosity
@@ -23,19 +31,23 @@ async def main() -> None:
     logging.basicConfig(level=logging.INFO)
     logging.getLogger("LiteLLM").setLevel(logging.WARNING)
 
-    client = await Client.connect("localhost:7233", namespace="default")
-
-    # Run the Worker
-    with concurrent.futures.ThreadPoolExecutor(max_workers=100) as activity_executor:
-        worker: Worker = Worker(
-            client,
-            task_queue="durable",
-            workflows=[GenerateReportWorkflow],
-            activities=[llm_call, create_pdf],
-            activity_executor=activity_executor,
-        )
-        logging.info("Starting the worker....")
-        await worker.run()
+    client = await Client.connect("localhost:7233", namespace="default", runtime=runtime_from_env())
+
+    # ADAPTIVE_CONCURRENCY=on swaps the fixed activity limit for one that backs off when the LLM provider pushes back
+    tuner = worker_tuner_from_env()
+
+    # Every activity is async, so one event loop holds all in-flight LLM calls without a thread each
+    worker: Worker = Worker(
+        client,
+        task_queue="durable",
+        workflows=[GenerateReportWorkflow],
+        activities=[llm_call, stream_llm_call, create_pdf],
+        max_concurrent_activities=None if tuner else MAX_CONCURRENT_ACTIVITIES,
+        tuner=tuner,
+        interceptors=[MetricsInterceptor()],
+    )
+    logging.info("Starting the worker....")
+    await worker.run()
 
 
 if __name__ == "__main__":
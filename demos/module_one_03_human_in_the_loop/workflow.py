@@ -1,19 +1,30 @@
+import contextlib
+from dataclasses import replace
 from datetime import timedelta
+from typing import NoReturn
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError, ApplicationError
+from temporalio.workflow import ActivityHandle
 
 with workflow.unsafe.imports_passed_through():
-    from activities import create_pdf, llm_call
+    from activities import create_pdf, llm_call, stream_llm_call
     from models import (
+        Draft,
         GenerateReportInput,
         GenerateReportOutput,
         LLMCallInput,
         PDFGenerationInput,
+        ResearchProgress,
         UserDecision,
         UserDecisionSignal,
     )
 
+# Start a fresh run (carrying the prompt and latest draft over) after this many edits, to keep history short
+EDITS_PER_RUN = 10
+
+
 @workflow.defn
 class GenerateReportWorkflow:
     def __init__(self) -> None:
@@ -22,38 +33,87 @@ class GenerateReportWorkflow:
             decision=UserDecision.WAIT
         )  # UserDecision Signal starts with WAIT as the default state
         self._research_result: str | None = None
+        self._partial_result: str = ""
+        self._edit_count: int = 0
+        self._draft: Draft | None = None
+        self._continuing_as_new = False
+        # Speculative render of a replaced draft. It may still be running, and it writes to the same file
+        self._discarded_pdf: ActivityHandle[str] | None = None
    
     @workflow.signal
     async def user_decision_signal(self, decision_data: UserDecisionSignal) -> None:
         self._user_decision = decision_data
 
+    @workflow.signal
+    async def research_progress_signal(self, progress: ResearchProgress) -> None:
+        self._partial_result = self._partial_result[: progress.offset] + progress.text
+
+
+    @workflow.update
+    async def wait_for_draft(self, after: int = 0) -> Draft:
+        """Return the latest draft once its number is above ``after``, waiting for it to be written if needed."""
+        await workflow.wait_condition(
+            lambda: (self._draft is not None and self._draft.number > after) or self._continuing_as_new
+        )
+        if self._draft is None or self._draft.number <= after:
+            # The next draft will be written by the new run, which the caller reaches by sending the update again
+            raise ApplicationError("The workflow continued as new before the draft was ready", type="ContinuedAsNew")
+        return self._draft
+
+    @wait_for_draft.validator
+    def reject_while_continuing_as_new(self, after: int = 0) -> None:  # noqa: ARG002
+        # Rejected updates aren't written to history, so callers retrying during the handover don't grow it
+        if self._continuing_as_new:
+            raise ApplicationError("The workflow is continuing as new", type="ContinuedAsNew")
 
     @workflow.query
     def get_research_result(self) -> str | None:
+        # While a streamed draft is being generated, return what has arrived so far
+        if self._research_result is None and self._partial_result:
+            return self._partial_result
         return self._research_result
 
     @workflow.run
     async def run(self, input: GenerateReportInput) -> GenerateReportOutput:
-        self._current_prompt = input.prompt
+        self._restore(input)
 
         llm_call_input = LLMCallInput(
             prompt=self._current_prompt,
         )
 
         continue_user_input_loop = True
+        # Speculative render of the current draft, started while waiting for the user's decision
+        pdf_handle: ActivityHandle[str] | None = None
 
         while continue_user_input_loop:
-            research_facts = await workflow.execute_activity(
-                llm_call,
-                llm_call_input,
-                start_to_close_timeout=timedelta(seconds=30),
-            )
-
-            # Store the research result for queries
-            self._research_result = research_facts["choices"][0]["message"]["content"]
+            if self._edit_count - input.edit_count >= EDITS_PER_RUN or workflow.info().is_continue_as_new_suggested():
+                await self._continue_as_new(input)
+
+            if input.stream:
+                self._research_result = None
+                self._partial_result = ""
+                research_facts = await workflow.execute_activity(
+                    stream_llm_call,
+                    llm_call_input,
+                    start_to_close_timeout=timedelta(minutes=5),
+                    heartbeat_timeout=timedelta(seconds=15),
+                )
+            else:
+                research_facts = await workflow.execute_activity(
+                    llm_call,
+                    llm_call_input,
+                    start_to_close_timeout=timedelta(seconds=30),
+                )
+
+            # Store the research result for queries, and hand it to anyone waiting on wait_for_draft
+            self._research_result = research_facts.content
+            self._draft = Draft(number=self._next_draft_number(), content=research_facts.content)
 
             print("Research complete!")
 
+            if input.speculative_pdf:
+                pdf_handle = await self._start_pdf(research_facts.content, input)
+
             print("Waiting for user decision.")
             await workflow.wait_condition(lambda: self._user_decision.decision != UserDecision.WAIT)
 
@@ -64,6 +124,11 @@ class GenerateReportWorkflow:
                 continue_user_input_loop = False
             elif user_decision.decision == UserDecision.EDIT:
                 print("User requested research modification.")
+                if pdf_handle is not None:
+                    # This draft is being replaced, so its PDF is no longer needed
+                    pdf_handle.cancel()
+                    self._discarded_pdf = pdf_handle
+                    pdf_handle = None
                 if user_decision.additional_prompt != "":
                     self._current_prompt = (
                         f"{self._current_prompt}\n\nAdditional instructions: {user_decision.additional_prompt}"
@@ -73,18 +138,65 @@ class GenerateReportWorkflow:
                     print("No additional instructions provided. Regenerating with original prompt.")
                 llm_call_input.prompt = self._current_prompt
                 self._user_decision = UserDecisionSignal(decision=UserDecision.WAIT)
+                self._edit_count += 1
+
+        if pdf_handle is None:
+            pdf_handle = await self._start_pdf(research_facts.content, input)
+        pdf_filename: str = await pdf_handle
 
-        pdf_generation_input = PDFGenerationInput(content=research_facts["choices"][0]["message"]["content"])
+        return GenerateReportOutput(result=f"Successfully created research report PDF: {pdf_filename}")
 
-        pdf_filename: str = await workflow.execute_activity(
+    async def _start_pdf(self, content: str, input: GenerateReportInput) -> ActivityHandle[str]:
+        await self._wait_for_discarded_pdf()
+        return workflow.start_activity(
             create_pdf,
-            pdf_generation_input,
+            PDFGenerationInput(content=content, output=input.pdf_output),
+            task_queue=input.pdf_task_queue,
             start_to_close_timeout=timedelta(seconds=20),
             retry_policy=RetryPolicy(
                 initial_interval=timedelta(seconds=1),
                 maximum_attempts=3,
                 backoff_coefficient=2.0,
             ),
+            # create_pdf doesn't heartbeat, so a cancelled render runs on; its handle resolves when it really stops
+            cancellation_type=workflow.ActivityCancellationType.WAIT_CANCELLATION_COMPLETED,
         )
 
-        return GenerateReportOutput(result=f"Successfully created research report PDF: {pdf_filename}")
\ No newline at end of file
+    async def _wait_for_discarded_pdf(self) -> None:
+        # A replaced draft's render that finished late would overwrite the PDF written after it
+        if self._discarded_pdf is None:
+            return
+        with contextlib.suppress(ActivityError):
+            await self._discarded_pdf
+        self._discarded_pdf = None
+
+    def _restore(self, input: GenerateReportInput) -> None:
+        # Pick up the state a previous run carried over with continue-as-new
+        self._current_prompt = input.prompt
+        self._research_result = input.research_result
+        self._edit_count = input.edit_count
+        if input.research_result is not None:
+            self._draft = Draft(number=input.draft_number, content=input.research_result)
+        if input.pending_decision is not None:
+            self._user_decision = input.pending_decision
+
+    def _next_draft_number(self) -> int:
+        return (self._draft.number if self._draft else 0) + 1
+
+    async def _continue_as_new(self, input: GenerateReportInput) -> NoReturn:
+        # Release wait_for_draft callers, then let in-flight handlers finish so a decision sent
+        # during the handover is carried over
+        self._continuing_as_new = True
+        await workflow.wait_condition(workflow.all_handlers_finished)
+        await self._wait_for_discarded_pdf()
+        print(f"Continuing as new after {self._edit_count} edits")
+        workflow.continue_as_new(
+            replace(
+                input,
+                prompt=self._current_prompt,
+                research_result=self._research_result,
+                edit_count=self._edit_count,
+                draft_number=self._draft.number if self._draft else 0,
+                pending_decision=self._user_decision if self._user_decision.decision != UserDecision.WAIT else None,
+            )
+        )
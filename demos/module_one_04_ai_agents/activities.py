@@ -0,0 +1,105 @@
+import functools
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Sequence  # noqa: UP035 - dynamic activities must take typing.Sequence[RawValue]
+
+from dotenv import load_dotenv
+from models import GetWeatherAlertsRequest, OpenAIResponsesRequest
+from openai.types.responses import Response
+from temporalio import activity
+from temporalio.common import RawValue
+from tools import TOOLS, tool, tool_schemas
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.http_clients import http_client, openai_client
+from common.llm_cache import cache_from_env, cache_key
+from common.metrics import record_cache_lookup, record_token_usage
+from common.rate_limit import estimate_tokens, throttled
+from common.single_flight import SingleFlight
+
+load_dotenv(override=True)
+
+# The OpenAI client reads OPENAI_API_KEY; fall back to the key the other demos use
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("LLM_API_KEY")
+
+# Constants for the National Weather Service API
+NWS_API_BASE = "https://api.weather.gov"
+USER_AGENT = "weather-app/1.0"
+
+# Identical concurrent alert lookups share one NWS request, and results are reused for NWS_CACHE_TTL seconds
+NWS_REQUESTS = SingleFlight[dict[str, Any] | None](ttl=float(os.getenv("NWS_CACHE_TTL", "60")))
+
+# Optional response cache in front of the model, selected with the LLM_CACHE environment variable
+RESPONSE_CACHE = cache_from_env()
+
+
+@activity.defn
+async def create(request: OpenAIResponsesRequest) -> Response:
+    # Registered tools are sent by name, so key on their schema digests rather than the names alone
+    key = cache_key(request.model, [request, [TOOLS[name].schema_digest for name in request.tool_names]])
+    if RESPONSE_CACHE is not None:
+        cached = RESPONSE_CACHE.get(key)
+        record_cache_lookup(cached is not None)
+        if cached is not None:
+            activity.logger.info(f"LLM response cache hit ({RESPONSE_CACHE.stats})")
+            return Response.model_validate_json(cached)
+
+    async with throttled(request.model, estimate_tokens(request.instructions + str(request.input))) as throttle:
+        resp = await openai_client(OPENAI_API_KEY).responses.create(
+            model=request.model,
+            instructions=request.instructions,
+            input=request.input,
+            tools=request.tools + tool_schemas(request.tool_names),
+            timeout=30,
+        )
+        if resp.usage is not None:
+            throttle.total_tokens = resp.usage.total_tokens
+            record_token_usage(request.model, resp.usage.input_tokens, resp.usage.output_tokens)
+
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.set(key, resp.model_dump_json())
+    return resp
+
+
+def _alerts_url(state: str) -> str:
+    """Build the NWS API URL for a given state."""
+    return f"{NWS_API_BASE}/alerts/active/area/{state}"
+
+
+async def _make_nws_request(url: str) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling."""
+    headers = {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
+    response = await http_client().get(url, headers=headers, timeout=5.0)
+    response.raise_for_status()
+    data: dict[str, Any] = response.json()
+    return data
+
+
+@tool()
+@activity.defn
+async def get_weather_alerts(weather_alerts_request: GetWeatherAlertsRequest) -> str:
+    """Get weather alerts for a US state.
+
+    Args:
+        state: Two-letter US state code (e.g. CA, NY)
+    """
+    url = _alerts_url(weather_alerts_request.state.upper())
+    data = await NWS_REQUESTS.do(url, functools.partial(_make_nws_request, url))
+    return json.dumps(data)
+
+
+@activity.defn(dynamic=True)
+async def dynamic_tool_activity(args: Sequence[RawValue]) -> Any:
+    tool_name = activity.info().activity_type
+
+    tool_args = activity.payload_converter().from_payload(args[0].payload, dict)
+    activity.logger.info(f"Running dynamic tool '{tool_name}' with args: {tool_args}")
+
+    if tool_name not in TOOLS:
+        raise ValueError(f"Unknown tool: {tool_name}")
+    result = await TOOLS[tool_name].run(tool_args)
+
+    activity.logger.info(f"Tool '{tool_name}' result: {result}")
+    return result
@@ -0,0 +1,178 @@
+"""Keep the agent's conversation within a token budget.
+
+`AgentWorkflow` resends its whole `input_list` on every `create` call. Each
+compaction stage takes that list and returns a smaller one. The stages run in
+order before every call. They run inside the Workflow, so they must be
+deterministic. Any model calls they need go through Activities.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Protocol
+
+from activities import create
+from models import OpenAIResponsesRequest
+from temporalio import workflow
+
+SUMMARY_INSTRUCTIONS = """
+Summarize the following conversation between a user and a tool-using assistant.
+Keep every fact, number and tool result the assistant may still need, and note which questions were already answered.
+Respond with the summary only.
+"""
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+class CompactionStage(Protocol):
+    async def __call__(self, items: list[Any]) -> list[Any]: ...
+
+
+def estimate_tokens(items: list[Any]) -> int:
+    """Roughly estimate the tokens in a list of input items (about 4 characters per token)."""
+    return sum(len(json.dumps(item, default=str)) for item in items) // 4
+
+
+def turn_boundaries(items: list[Any]) -> list[int]:
+    """Return the indexes where the list can be split without separating a tool call from its output."""
+    boundaries = []
+    pending: set[str] = set()
+    previous_type = None
+    for i, item in enumerate(items):
+        item_type = item.get("type")
+        if not pending and item_type != "function_call_output" and previous_type != "reasoning":
+            boundaries.append(i)
+        if item_type == "function_call":
+            pending.add(item["call_id"])
+        elif item_type == "function_call_output":
+            pending.discard(item["call_id"])
+        previous_type = item_type
+    return boundaries
+
+
+def render_transcript(items: list[Any]) -> str:
+    """Render input items as plain text for the summarizer."""
+    lines = []
+    for item in items:
+        item_type = item.get("type", "message")
+        if item_type == "message":
+            content = item["content"]
+            if not isinstance(content, str):
+                content = "".join(part.get("text", "") for part in content)
+            lines.append(f"{item['role']}: {content}")
+        elif item_type == "function_call":
+            lines.append(f"tool call {item['name']}({item['arguments']})")
+        elif item_type == "function_call_output":
+            lines.append(f"tool result: {item['output']}")
+    return "\n".join(lines)
+
+
+@dataclass
+class ElideToolOutputs:
+    """Replace large tool outputs the model has already seen with a short reference.
+
+    Outputs added since the last model call are sent in full once. After that,
+    anything over `max_chars` is cut down to a preview that points at the
+    Activity result in the Workflow history.
+    """
+
+    max_chars: int = 2_000
+    preview_chars: int = 500
+
+    async def __call__(self, items: list[Any]) -> list[Any]:
+        # tool outputs after the last tool call have not been sent to the model yet
+        last_call = max((i for i, item in enumerate(items) if item.get("type") == "function_call"), default=-1)
+        compacted = []
+        for i, item in enumerate(items):
+            output = item.get("output")
+            if (
+                i < last_call
+                and item.get("type") == "function_call_output"
+                and isinstance(output, str)
+                and len(output) > self.max_chars
+            ):
+                elided = len(output) - self.preview_chars
+                compacted.append(
+                    {
+                        **item,
+                        "output": f"{output[: self.preview_chars]}\n[{elided} more characters elided; the full "
+                        f"result is in the Workflow history for call {item['call_id']}]",
+                    }
+                )
+            else:
+                compacted.append(item)
+        return compacted
+
+
+@dataclass
+class SummarizeOldTurns:
+    """Summarize the oldest turns with the model once the conversation exceeds `max_tokens`.
+
+    The user's original request and the most recent `keep_recent_tokens` of
+    the conversation are kept verbatim. The turns in between are replaced with
+    a single summary message produced by the `create` Activity.
+    """
+
+    max_tokens: int = 8_000
+    keep_recent_tokens: int = 4_000
+    model: str = "gpt-4o-mini"
+
+    async def __call__(self, items: list[Any]) -> list[Any]:
+        if estimate_tokens(items) <= self.max_tokens:
+            return items
+
+        # keep the first item (the user's request) and find the oldest boundary whose tail fits in the budget
+        boundaries = [i for i in turn_boundaries(items) if i > 1]
+        split = next((i for i in boundaries if estimate_tokens(items[i:]) <= self.keep_recent_tokens), None)
+        if split is None:
+            split = boundaries[-1] if boundaries else None
+        if split is None:
+            return items
+
+        result = await workflow.execute_activity(
+            create,
+            OpenAIResponsesRequest(
+                model=self.model,
+                instructions=SUMMARY_INSTRUCTIONS,
+                input=[{"type": "message", "role": "user", "content": render_transcript(items[1:split])}],
+                tools=[],
+            ),
+            start_to_close_timeout=timedelta(seconds=30),
+        )
+        summary = {"type": "message", "role": "user", "content": SUMMARY_PREFIX + result.output_text}
+        print(f"Summarized {split - 1} conversation items")
+        return [items[0], summary, *items[split:]]
+
+
+@dataclass
+class TruncateToBudget:
+    """Drop the oldest turns, keeping the user's original request, until the conversation fits in `max_tokens`."""
+
+    max_tokens: int = 12_000
+
+    async def __call__(self, items: list[Any]) -> list[Any]:
+        if estimate_tokens(items) <= self.max_tokens:
+            return items
+
+        boundaries = [i for i in turn_boundaries(items) if i > 1]
+        if not boundaries:
+            return items
+        for split in boundaries:
+            if estimate_tokens([items[0], *items[split:]]) <= self.max_tokens:
+                break
+        else:
+            # even the last turn on its own is over budget; keep it so the model can still answer
+            split = boundaries[-1]
+
+        print(f"Dropped {split - 1} conversation items to fit the token budget")
+        return [items[0], *items[split:]]
+
+
+DEFAULT_COMPACTION: tuple[CompactionStage, ...] = (ElideToolOutputs(), SummarizeOldTurns(), TruncateToBudget())
+
+
+async def compact(items: list[Any], stages: tuple[CompactionStage, ...] = DEFAULT_COMPACTION) -> list[Any]:
+    """Run each compaction stage over the input items in order."""
+    for stage in stages:
+        items = await stage(items)
+    return items
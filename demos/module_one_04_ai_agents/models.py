@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+@dataclass
+class OpenAIResponsesRequest:
+    model: str
+    instructions: str
+    input: object
+    tools: list[dict[str, Any]]
+    # Names of tools in the tools.TOOLS registry. The create Activity expands them into their precomputed
+    # schemas, so each turn sends a few names through the data converter instead of every schema.
+    tool_names: list[str] = field(default_factory=list)
+
+
+class GetWeatherAlertsRequest(BaseModel):
+    state: str = Field(description="Two-letter US state code (e.g. CA, NY)")
+
+
+class GetLocationRequest(BaseModel):
+    ipaddress: str = Field(description="An IP address")
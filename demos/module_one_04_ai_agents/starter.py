@@ -0,0 +1,29 @@
+import asyncio
+import sys
+import uuid
+
+from temporalio.client import Client
+from temporalio.contrib.pydantic import pydantic_data_converter
+from worker import TASK_QUEUE
+from workflow import AgentWorkflow
+
+
+async def main() -> None:
+    client = await Client.connect("localhost:7233", data_converter=pydantic_data_converter)
+
+    query = sys.argv[1] if len(sys.argv) > 1 else "What are the weather alerts in California?"
+
+    handle = await client.start_workflow(
+        AgentWorkflow.run,
+        query,
+        id=f"agent-workflow-{uuid.uuid4()}",
+        task_queue=TASK_QUEUE,
+    )
+
+    print(f"Started workflow. Workflow ID: {handle.id}, RunID {handle.result_run_id}")
+    result = await handle.result()
+    print(f"Result: {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
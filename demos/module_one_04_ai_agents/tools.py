@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import inspect
+import json
+import random
+import sys
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+from models import GetLocationRequest
+from openai.lib._pydantic import to_strict_json_schema
+from pydantic import BaseModel
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.http_clients import http_client
+from common.single_flight import SingleFlight
+
+HELPFUL_AGENT_SYSTEM_INSTRUCTIONS = """
+You are a helpful agent that can use tools to help the user.
+You will be given a task and a list of tools to use.
+You may or may not need to use the tools to complete the task.
+If no tools are needed, respond in haikus.
+"""
+
+
+# Memoized per (name, description, model): the schema is built once and the same dict is returned after that,
+# so callers must not modify it
+@functools.cache
+def oai_responses_tool_from_model(name: str, description: str, model: type[BaseModel] | None) -> dict[str, Any]:
+    return {
+        "type": "function",
+        "name": name,
+        "description": description,
+        # OpenAI Responses strict tools require a JSON Schema object where
+        # additionalProperties is explicitly false. For tools without
+        # parameters, supply an empty object schema.
+        "parameters": (
+            to_strict_json_schema(model)
+            if model
+            else {"type": "object", "properties": {}, "required": [], "additionalProperties": False}
+        ),
+        "strict": True,
+    }
+
+
+@dataclass(frozen=True)
+class Tool:
+    """A tool the agent can call, with everything needed to dispatch it worked out at registration."""
+
+    name: str
+    handler: Callable[..., Any]
+    # Pydantic model the JSON arguments are validated into, or None if the handler takes no arguments
+    args_model: type[BaseModel] | None
+    is_async: bool
+    schema: dict[str, Any]
+    # Hash of the serialized schema, so response cache keys change when a tool's schema does
+    schema_digest: str
+    # Collapses identical concurrent calls (and caches results) for tools registered with cache_ttl
+    flight: SingleFlight[Any] | None = None
+
+    async def run(self, args: dict[str, Any]) -> Any:
+        if self.flight is None:
+            return await self._call(args)
+        return await self.flight.do(json.dumps(args, sort_keys=True), functools.partial(self._call, args))
+
+    async def _call(self, args: dict[str, Any]) -> Any:
+        call_args = [] if self.args_model is None else [self.args_model.model_validate(args)]
+        return await self.handler(*call_args) if self.is_async else self.handler(*call_args)
+
+
+# Tool registry - maps tool names to tools, in registration order
+TOOLS: dict[str, Tool] = {}
+_TOOL_SCHEMAS: list[dict[str, Any]] = []
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def tool(description: str | None = None, cache_ttl: float | None = None) -> Callable[[F], F]:
+    """Register a function as an agent tool.
+
+    The tool is named after the function and described by `description`, or
+    the first line of its docstring. Its arguments come from the Pydantic
+    model annotated on its first parameter, if it has one.
+
+    Only set `cache_ttl` for tools whose result depends on nothing but their
+    arguments. Identical calls made at the same time then share one upstream
+    request, and the result is reused for `cache_ttl` seconds (0 shares
+    in-flight calls without caching).
+    """
+
+    def register(handler: F) -> F:
+        name = handler.__name__
+        if name in TOOLS:
+            raise ValueError(f"Tool already registered: {name}")
+
+        params = list(inspect.signature(handler, eval_str=True).parameters.values())
+        args_model = params[0].annotation if params else None
+        if args_model is not None and not (isinstance(args_model, type) and issubclass(args_model, BaseModel)):
+            raise TypeError(f"Tool {name} must take no arguments or a single Pydantic model")
+
+        doc = (inspect.getdoc(handler) or "").splitlines()
+        schema = oai_responses_tool_from_model(name, description or (doc[0] if doc else name), args_model)
+        digest = hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+        flight = SingleFlight[Any](ttl=cache_ttl) if cache_ttl is not None else None
+        TOOLS[name] = Tool(name, handler, args_model, inspect.iscoroutinefunction(handler), schema, digest, flight)
+        _TOOL_SCHEMAS.append(schema)
+        return handler
+
+    return register
+
+
+@tool()
+async def get_random_number() -> str:
+    """Get a random number between 0 and 100."""
+    data = random.randint(0, 100)
+    return str(data)
+
+
+@tool(cache_ttl=300)
+async def get_ip_address() -> str:
+    """Get the IP address of the current machine."""
+    response = await http_client().get("https://icanhazip.com")
+    response.raise_for_status()
+    return response.text.strip()
+
+
+@tool(
+    "Get the location information for an IP address. This includes the city, state, and country.",
+    cache_ttl=3600,
+)
+async def get_location_info(req: GetLocationRequest) -> str:
+    """Get location information for an IP address."""
+    response = await http_client().get(f"http://ip-api.com/json/{req.ipaddress}")
+    response.raise_for_status()
+    result = response.json()
+    return f"{result['city']}, {result['regionName']}, {result['country']}"
+
+
+# Create the tool list for the agent; built once as tools register, so don't modify it
+def get_tools() -> list[dict[str, Any]]:
+    return _TOOL_SCHEMAS
+
+
+# Names of every registered tool, for OpenAIResponsesRequest.tool_names
+def get_tool_names() -> list[str]:
+    return list(TOOLS)
+
+
+def tool_schemas(names: Sequence[str]) -> list[dict[str, Any]]:
+    """Look up the precomputed schemas of registered tools by name."""
+    return [TOOLS[name].schema for name in names]
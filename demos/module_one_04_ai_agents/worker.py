@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import sys
+import warnings
+from pathlib import Path
+
+from activities import create, dynamic_tool_activity, get_weather_alerts
+from temporalio.client import Client
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.worker import Worker
+from workflow import AgentWorkflow, ToolCallingWorkflow
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.http_clients import close_http_clients
+from common.metrics import MetricsInterceptor, runtime_from_env
+from common.rate_limit import worker_tuner_from_env
+
+TASK_QUEUE = "agent-python-task-queue"
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    # Reduce noise from various libraries
+    logging.getLogger("temporalio").setLevel(logging.WARNING)
+    logging.getLogger("openai").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # Suppress Pydantic converter warning
+    warnings.filterwarnings("ignore", category=UserWarning, module="temporalio.converter")
+
+    client = await Client.connect(
+        "localhost:7233", namespace="default", runtime=runtime_from_env(), data_converter=pydantic_data_converter
+    )
+
+    # Run the Worker. Every activity is async and shares the pooled HTTP clients, so no thread pool is needed
+    worker: Worker = Worker(
+        client,
+        task_queue=TASK_QUEUE,
+        workflows=[AgentWorkflow, ToolCallingWorkflow],
+        activities=[create, get_weather_alerts, dynamic_tool_activity],
+        # ADAPTIVE_CONCURRENCY=on limits activity pickup with a limit that backs off when the LLM provider pushes back
+        tuner=worker_tuner_from_env(),
+        interceptors=[MetricsInterceptor()],
+    )
+    logging.info("Starting the worker....")
+    try:
+        await worker.run()
+    finally:
+        await close_http_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from datetime import timedelta
+from typing import Any
+
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from activities import create, get_weather_alerts
+    from compaction import compact
+    from models import GetWeatherAlertsRequest, OpenAIResponsesRequest
+    from openai.types.responses import ResponseFunctionToolCall
+    from tools import HELPFUL_AGENT_SYSTEM_INSTRUCTIONS, get_tool_names
+
+
+@workflow.defn
+class ToolCallingWorkflow:
+    @workflow.run
+    async def run(self, input: str) -> str:
+        input_list: list[Any] = [{"role": "user", "content": input}]
+
+        # Initial LLM call with system instructions and tools
+        system_instructions = "if no tools seem to be needed, respond in haikus."
+        result = await workflow.execute_activity(
+            create,
+            OpenAIResponsesRequest(
+                model="gpt-4o-mini",
+                instructions=system_instructions,
+                input=input_list,
+                tools=[],
+                tool_names=["get_weather_alerts"],
+            ),
+            start_to_close_timeout=timedelta(seconds=30),
+        )
+
+        # Process the LLM response
+        item = result.output[0]
+
+        # if the result is a tool call, call the tool
+        if item.type == "function_call" and item.name == "get_weather_alerts":
+            # serialize the output, which is an OpenAI object
+            input_list += [i.model_dump() for i in result.output]
+
+            alerts = await workflow.execute_activity(
+                get_weather_alerts,
+                GetWeatherAlertsRequest(state=json.loads(item.arguments)["state"]),
+                start_to_close_timeout=timedelta(seconds=30),
+            )
+
+            # Add tool call result to input list
+            input_list.append({"type": "function_call_output", "call_id": item.call_id, "output": alerts})
+
+            result = await workflow.execute_activity(
+                create,
+                OpenAIResponsesRequest(
+                    model="gpt-4o-mini",
+                    instructions="return the tool call result in a readable format",
+                    input=input_list,
+                    tools=[],
+                ),
+                start_to_close_timeout=timedelta(seconds=30),
+            )
+
+        return result.output_text
+
+
+@workflow.defn
+class AgentWorkflow:
+    @workflow.run
+    async def run(self, input: str) -> str:
+        input_list: list[Any] = [{"type": "message", "role": "user", "content": input}]
+
+        while True:
+            print(80 * "=")
+
+            # keep the conversation within the model's context window before resending it
+            input_list = await compact(input_list)
+
+            # consult the LLM
+            result = await workflow.execute_activity(
+                create,
+                OpenAIResponsesRequest(
+                    model="gpt-4o-mini",
+                    instructions=HELPFUL_AGENT_SYSTEM_INSTRUCTIONS,
+                    input=input_list,
+                    tools=[],
+                    tool_names=get_tool_names(),
+                ),
+                start_to_close_timeout=timedelta(seconds=30),
+            )
+
+            function_calls = [item for item in result.output if item.type == "function_call"]
+
+            if function_calls:
+                # serialize the LLM output - the decision the LLM made to call one or more tools
+                input_list += [item.model_dump() for item in result.output]
+
+                # run every tool the LLM asked for in this turn concurrently
+                tool_results = await asyncio.gather(*(self._handle_function_call(item) for item in function_calls))
+
+                # add the tool call results to the input list for context
+                for item, tool_result in zip(function_calls, tool_results, strict=True):
+                    input_list.append({"type": "function_call_output", "call_id": item.call_id, "output": tool_result})
+
+            else:
+                print(f"No tools chosen, responding with a message: {result.output_text}")
+                return result.output_text
+
+    async def _handle_function_call(self, item: ResponseFunctionToolCall) -> Any:
+        # execute dynamic activity with the tool name chosen by the LLM
+        args = json.loads(item.arguments) if isinstance(item.arguments, str) else item.arguments
+
+        tool_result = await workflow.execute_activity(
+            item.name,
+            args,
+            start_to_close_timeout=timedelta(seconds=30),
+        )
+
+        print(f"Made a tool call to {item.name}")
+        return tool_result
@@ -0,0 +1,50 @@
+import importlib
+import sys
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+from fakes import FakeClock
+from temporal_server import TemporalServer
+
+DEMOS = Path(__file__).resolve().parents[1] / "demos"
+# Every demo directory has its own activities, models and workflow modules, imported by those bare names
+DEMO_MODULE_NAMES = ("activities", "compaction", "models", "starter", "tools", "worker", "workflow")
+
+
+def _forget_demo_modules() -> None:
+    for name in DEMO_MODULE_NAMES:
+        sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture(scope="session")
+def temporal() -> Iterator[TemporalServer]:
+    """A dev server shared by the session's Workflow tests, which are skipped when it can't be started."""
+    server = TemporalServer()
+    # The server is downloaded on first use, which can fail in many ways
+    try:
+        server.start()
+    except Exception as e:
+        server.stop()
+        pytest.skip(f"Temporal dev server unavailable: {e}")
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def demo_module(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[[str, str], ModuleType]]:
+    """Import a module from one demo directory, e.g. ``demo_module("module_one_04_ai_agents", "compaction")``."""
+
+    def load(directory: str, name: str) -> ModuleType:
+        _forget_demo_modules()
+        monkeypatch.syspath_prepend(str(DEMOS / directory))
+        return importlib.import_module(name)
+
+    yield load
+    _forget_demo_modules()
@@ -0,0 +1,20 @@
+class FakeClock:
+    """Stands in for a module's ``time``, so tests can move time forward without sleeping."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    async def sleep(self, seconds: float) -> None:
+        """Stands in for ``asyncio.sleep``: records the wait and moves time forward by it."""
+        self.sleeps.append(seconds)
+        self.advance(seconds)
@@ -0,0 +1,28 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from temporalio.client import Client
+from temporalio.testing import WorkflowEnvironment
+
+
+class TemporalServer:
+    """A local Temporal dev server, with the event loop its client is bound to.
+
+    Tests run without an async plugin, so each Workflow test hands its scenario to ``run``.
+    """
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._env: WorkflowEnvironment | None = None
+
+    def start(self) -> None:
+        self._env = self._loop.run_until_complete(WorkflowEnvironment.start_local())
+
+    def run[T](self, scenario: Callable[[Client], Awaitable[T]]) -> T:
+        assert self._env is not None
+        return self._loop.run_until_complete(scenario(self._env.client))
+
+    def stop(self) -> None:
+        if self._env is not None:
+            self._loop.run_until_complete(self._env.shutdown())
+        self._loop.close()
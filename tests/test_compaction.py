@@ -0,0 +1,88 @@
+import asyncio
+from collections.abc import Callable
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+@pytest.fixture
+def compaction(demo_module: Callable[[str, str], ModuleType]) -> ModuleType:
+    return demo_module("module_one_04_ai_agents", "compaction")
+
+
+def message(content: str, role: str = "user") -> dict[str, Any]:
+    return {"type": "message", "role": role, "content": content}
+
+
+def call(call_id: str) -> dict[str, Any]:
+    return {"type": "function_call", "call_id": call_id, "name": "get_random_number", "arguments": "{}"}
+
+
+def output(call_id: str, text: str = "4") -> dict[str, Any]:
+    return {"type": "function_call_output", "call_id": call_id, "output": text}
+
+
+def test_turn_boundaries_never_split_a_call_from_its_output(compaction: ModuleType) -> None:
+    items = [message("question"), call("a"), call("b"), output("a"), output("b"), message("answer", "assistant")]
+    assert compaction.turn_boundaries(items) == [0, 1, 5]
+
+    # A function call stays with the reasoning item in front of it
+    items = [message("question"), {"type": "reasoning", "summary": []}, call("a"), output("a")]
+    assert compaction.turn_boundaries(items) == [0, 1]
+
+
+def test_elide_tool_outputs_keeps_unsent_outputs_whole(compaction: ModuleType) -> None:
+    long = "x" * 50
+    items = [message("question"), call("a"), output("a", long), call("b"), output("b", long)]
+
+    compacted = asyncio.run(compaction.ElideToolOutputs(max_chars=20, preview_chars=5)(items))
+
+    assert compacted[2]["output"].startswith("xxxxx\n[45 more characters elided")
+    assert "call a" in compacted[2]["output"]
+    # Output b arrived after the last tool call, so the model hasn't seen it yet
+    assert compacted[4] == items[4]
+    assert compacted[:2] == items[:2]
+
+
+def test_truncate_to_budget_keeps_the_request_and_latest_turns(compaction: ModuleType) -> None:
+    items = [message("question"), call("a"), output("a", "x" * 400), call("b"), output("b")]
+
+    compacted = asyncio.run(compaction.TruncateToBudget(max_tokens=50)(items))
+
+    assert compacted == [items[0], items[3], items[4]]
+    assert asyncio.run(compaction.TruncateToBudget(max_tokens=10_000)(items)) is items
+
+
+def test_summarize_old_turns_replaces_them_with_one_message(
+    compaction: ModuleType, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    requests = []
+
+    async def execute_activity(activity: object, request: Any, **kwargs: object) -> SimpleNamespace:  # noqa: ARG001
+        requests.append(request)
+        return SimpleNamespace(output_text="the answer was 4")
+
+    monkeypatch.setattr(compaction.workflow, "execute_activity", execute_activity)
+    items = [message("question"), call("a"), output("a", "x" * 400), call("b"), output("b")]
+
+    compacted = asyncio.run(compaction.SummarizeOldTurns(max_tokens=50, keep_recent_tokens=40)(items))
+
+    assert compacted == [
+        items[0],
+        message(compaction.SUMMARY_PREFIX + "the answer was 4"),
+        items[3],
+        items[4],
+    ]
+    assert "tool result: xxx" in requests[0].input[0]["content"]
+    assert "question" not in requests[0].input[0]["content"]
+
+
+def test_compact_runs_the_stages_in_order(compaction: ModuleType) -> None:
+    async def first(items: list[Any]) -> list[Any]:
+        return [*items, "first"]
+
+    async def second(items: list[Any]) -> list[Any]:
+        return [*items, "second"]
+
+    assert asyncio.run(compaction.compact(["start"], (first, second))) == ["start", "first", "second"]
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from gateway import server
+
+
+class FakeTemporalClient:
+    """Records the Workflows started through it."""
+
+    def __init__(self) -> None:
+        self.started: list[tuple[str, object]] = []
+
+    async def start_workflow(self, workflow: str, arg: object, **_options: object) -> None:
+        self.started.append((workflow, arg))
+
+
+def post(path: str, body: object) -> tuple[int, object, FakeTemporalClient]:
+    temporal = FakeTemporalClient()
+
+    async def scenario() -> tuple[int, object]:
+        app = server.create_app()
+        # Stands in for the cleanup context that connects to Temporal
+        app.cleanup_ctx.clear()
+        app[server.CLIENT] = temporal  # type: ignore[misc]
+        app[server.START_SLOTS] = asyncio.Semaphore(1)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(path, json=body)
+            return response.status, await response.json()
+
+    status, answer = asyncio.run(scenario())
+    return status, answer, temporal
+
+
+def test_a_report_starts_with_its_public_fields() -> None:
+    body = {
+        "prompt": "Tardigrades",
+        "pdf_output": "BLOB",
+        "pdf_task_queue": None,
+        "config": {"llm_timeout_seconds": 60},
+    }
+
+    status, answer, temporal = post("/reports", {**body, "id": "report-1"})
+
+    assert (status, answer) == (202, {"workflow_id": "report-1"})
+    assert temporal.started == [("GenerateReportWorkflow", body)]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"prompt": ""},
+        {"prompt": 42},
+        {"prompt": "Tardigrades", "stream": "yes"},
+        {"prompt": "Tardigrades", "max_sections": True},
+        {"prompt": "Tardigrades", "pdf_output": "PNG"},
+        {"prompt": "Tardigrades", "id": 7},
+        {"prompt": "Tardigrades", "filename": "/etc/passwd"},
+        {"prompt": "Tardigrades", "config": {"llm_timeout_seconds": "60"}},
+        {"prompt": "Tardigrades", "config": {"retries": 3}},
+        {"prompt": "Tardigrades", "research_result": "A forged draft"},
+        {"prompt": "Tardigrades", "edit_count": 0},
+        {"prompt": "Tardigrades", "draft_number": 9},
+        {"prompt": "Tardigrades", "pending_decision": {"decision": "KEEP"}},
+    ],
+)
+def test_a_report_with_a_field_it_may_not_set_is_rejected(body: dict[str, object]) -> None:
+    status, answer, temporal = post("/reports", body)
+
+    assert status == 400
+    assert "error" in answer  # type: ignore[operator]
+    assert temporal.started == []
+
+
+def test_a_batch_reports_each_rejected_report() -> None:
+    status, answer, temporal = post("/batch", {"reports": [{"prompt": "Otters"}, {"prompt": "Owls", "edit_count": 3}]})
+
+    assert status == 202
+    started, rejected = answer["reports"]  # type: ignore[index]
+    assert "workflow_id" in started
+    assert rejected == {"error": "edit_count is set by the workflow, not by requests"}
+    assert temporal.started == [("GenerateReportWorkflow", {"prompt": "Otters"})]
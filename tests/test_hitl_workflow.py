@@ -0,0 +1,251 @@
+import asyncio
+import sys
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from types import ModuleType
+
+import pytest
+from common.report_models import LLMCallInput, LLMCallResult, PDFGenerationInput
+from fakes import FakeClock
+from temporal_server import TemporalServer
+from temporalio import activity
+from temporalio.client import Client, WithStartWorkflowOperation, WorkflowUpdateFailedError
+from temporalio.common import WorkflowIDConflictPolicy
+from temporalio.exceptions import ApplicationError
+from temporalio.worker import UnsandboxedWorkflowRunner, Worker
+
+HITL = "module_one_03_human_in_the_loop"
+TASK_QUEUE = "hitl-test"
+
+
+@pytest.fixture
+def starter(demo_module: Callable[[str, str], ModuleType]) -> ModuleType:
+    # The starter imports the workflow and models modules, which the tests reach through sys.modules
+    return demo_module(HITL, "starter")
+
+
+@dataclass
+class FakeActivities:
+    """Answers every prompt with a draft naming it, and records the drafts rendered to PDF as they finish."""
+
+    rendered: list[str] = field(default_factory=list)
+    # Drafts whose render takes a second
+    slow: set[str] = field(default_factory=set)
+
+    def worker(self, client: Client, workflow: type) -> Worker:
+        @activity.defn(name="llm_call")
+        async def llm_call(input: LLMCallInput) -> LLMCallResult:
+            return LLMCallResult(content=f"Draft for: {input.prompt}")
+
+        @activity.defn(name="create_pdf")
+        async def create_pdf(input: PDFGenerationInput) -> str:
+            if input.content in self.slow:
+                await asyncio.sleep(1)
+            self.rendered.append(input.content)
+            return "research_pdf.pdf"
+
+        # Unsandboxed, so the Workflow sees module attributes the tests patch
+        return Worker(
+            client,
+            task_queue=TASK_QUEUE,
+            workflows=[workflow],
+            activities=[llm_call, create_pdf],
+            workflow_runner=UnsandboxedWorkflowRunner(),
+        )
+
+
+@dataclass
+class HandingOverHandle:
+    """Fails the first ``handovers`` wait_for_draft updates with ContinuedAsNew, then returns ``draft``."""
+
+    draft: object
+    handovers: int
+    updates: int = 0
+
+    async def execute_update(self, _update: object, _after: int) -> object:
+        self.updates += 1
+        if self.updates <= self.handovers:
+            raise WorkflowUpdateFailedError(ApplicationError("Continuing as new", type="ContinuedAsNew"))
+        return self.draft
+
+
+def test_the_starter_waits_before_resending_during_a_handover(
+    starter: ModuleType, monkeypatch: pytest.MonkeyPatch, clock: FakeClock
+) -> None:
+    monkeypatch.setattr(starter.asyncio, "sleep", clock.sleep)
+    handle = HandingOverHandle(draft="Draft 3", handovers=2)
+
+    assert asyncio.run(starter.wait_for_next_draft(handle, 2)) == "Draft 3"
+    assert handle.updates == 3
+    assert clock.sleeps == [starter.CONTINUE_AS_NEW_RETRY_SECONDS] * 2
+
+
+@pytest.mark.usefixtures("starter")
+def test_wait_for_draft_is_rejected_while_continuing_as_new() -> None:
+    workflow = sys.modules["workflow"].GenerateReportWorkflow()
+    workflow.reject_while_continuing_as_new(1)
+
+    workflow._continuing_as_new = True
+    with pytest.raises(ApplicationError) as rejected:
+        workflow.reject_while_continuing_as_new(1)
+    assert rejected.value.type == "ContinuedAsNew"
+
+
+@pytest.mark.usefixtures("starter")
+def test_restore_starts_a_fresh_review() -> None:
+    models = sys.modules["models"]
+    workflow = sys.modules["workflow"].GenerateReportWorkflow()
+
+    workflow._restore(models.GenerateReportInput(prompt="Tardigrades"))
+
+    assert workflow._current_prompt == "Tardigrades"
+    assert workflow._draft is None
+    assert workflow._next_draft_number() == 1
+    assert workflow._user_decision.decision == models.UserDecision.WAIT
+    assert workflow.get_research_result() is None
+
+
+@pytest.mark.usefixtures("starter")
+def test_restore_picks_up_the_carried_over_review() -> None:
+    models = sys.modules["models"]
+    workflow = sys.modules["workflow"].GenerateReportWorkflow()
+    decision = models.UserDecisionSignal(decision=models.UserDecision.EDIT, additional_prompt="Shorter")
+
+    workflow._restore(
+        models.GenerateReportInput(
+            prompt="Tardigrades, shorter",
+            research_result="Draft 4",
+            edit_count=3,
+            draft_number=4,
+            pending_decision=decision,
+        )
+    )
+
+    assert workflow._current_prompt == "Tardigrades, shorter"
+    assert workflow._edit_count == 3
+    assert workflow._draft == models.Draft(number=4, content="Draft 4")
+    assert workflow._next_draft_number() == 5
+    assert workflow._user_decision == decision
+    assert workflow.get_research_result() == "Draft 4"
+
+
+@pytest.mark.usefixtures("starter")
+def test_wait_for_draft_waits_for_the_next_draft(temporal: TemporalServer) -> None:
+    models = sys.modules["models"]
+    workflow = sys.modules["workflow"]
+    activities = FakeActivities()
+
+    async def review(client: Client) -> None:
+        async with activities.worker(client, workflow.GenerateReportWorkflow):
+            start_operation = WithStartWorkflowOperation(
+                workflow.GenerateReportWorkflow.run,
+                models.GenerateReportInput(prompt="Tardigrades"),
+                id=f"hitl-test-{uuid.uuid4()}",
+                id_conflict_policy=WorkflowIDConflictPolicy.FAIL,
+                task_queue=TASK_QUEUE,
+            )
+            first = await client.execute_update_with_start_workflow(
+                workflow.GenerateReportWorkflow.wait_for_draft, 0, start_workflow_operation=start_operation
+            )
+            assert first == models.Draft(number=1, content="Draft for: Tardigrades")
+            handle = await start_operation.workflow_handle()
+
+            # The update sent before the edit is answered once the edited draft is written
+            waiting = asyncio.create_task(handle.execute_update(workflow.GenerateReportWorkflow.wait_for_draft, 1))
+            await handle.signal(
+                workflow.GenerateReportWorkflow.user_decision_signal,
+                models.UserDecisionSignal(decision=models.UserDecision.EDIT, additional_prompt="Shorter"),
+            )
+            second = await waiting
+            assert second == models.Draft(
+                number=2, content="Draft for: Tardigrades\n\nAdditional instructions: Shorter"
+            )
+
+            # A draft that has already been written is returned straight away
+            assert await handle.execute_update(workflow.GenerateReportWorkflow.wait_for_draft, 0) == second
+
+            await handle.signal(
+                workflow.GenerateReportWorkflow.user_decision_signal,
+                models.UserDecisionSignal(decision=models.UserDecision.KEEP),
+            )
+            await handle.result()
+
+    temporal.run(review)
+
+
+def test_continue_as_new_carries_the_review_over(
+    temporal: TemporalServer, starter: ModuleType, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    models = sys.modules["models"]
+    workflow = sys.modules["workflow"]
+    monkeypatch.setattr(workflow, "EDITS_PER_RUN", 2)
+    activities = FakeActivities()
+
+    async def review(client: Client) -> None:
+        async with activities.worker(client, workflow.GenerateReportWorkflow):
+            first_run = await client.start_workflow(
+                workflow.GenerateReportWorkflow.run,
+                models.GenerateReportInput(prompt="Tardigrades"),
+                id=f"hitl-test-{uuid.uuid4()}",
+                task_queue=TASK_QUEUE,
+            )
+            handle = client.get_workflow_handle_for(workflow.GenerateReportWorkflow.run, first_run.id)
+
+            draft = await starter.wait_for_next_draft(handle, 0)
+            for instructions in ["Shorter", "Funnier"]:
+                await handle.signal(
+                    workflow.GenerateReportWorkflow.user_decision_signal,
+                    models.UserDecisionSignal(decision=models.UserDecision.EDIT, additional_prompt=instructions),
+                )
+                draft = await starter.wait_for_next_draft(handle, draft.number)
+
+            # The second edit reached EDITS_PER_RUN, so the third draft was written by a new run
+            assert (await handle.describe()).run_id != first_run.result_run_id
+            assert draft == models.Draft(
+                number=3,
+                content="Draft for: Tardigrades\n\nAdditional instructions: Shorter\n\nAdditional instructions: Funnier",
+            )
+            assert await handle.query(workflow.GenerateReportWorkflow.get_research_result) == draft.content
+
+            await handle.signal(
+                workflow.GenerateReportWorkflow.user_decision_signal,
+                models.UserDecisionSignal(decision=models.UserDecision.KEEP),
+            )
+            await handle.result()
+            assert activities.rendered == [draft.content]
+
+    temporal.run(review)
+
+
+def test_a_discarded_speculative_render_finishes_before_the_next_starts(
+    temporal: TemporalServer, starter: ModuleType
+) -> None:
+    models = sys.modules["models"]
+    workflow = sys.modules["workflow"]
+    activities = FakeActivities(slow={"Draft for: Tardigrades"})
+
+    async def review(client: Client) -> None:
+        async with activities.worker(client, workflow.GenerateReportWorkflow):
+            handle = await client.start_workflow(
+                workflow.GenerateReportWorkflow.run,
+                models.GenerateReportInput(prompt="Tardigrades", speculative_pdf=True),
+                id=f"hitl-test-{uuid.uuid4()}",
+                task_queue=TASK_QUEUE,
+            )
+            first = await starter.wait_for_next_draft(handle, 0)
+            await handle.signal(
+                workflow.GenerateReportWorkflow.user_decision_signal,
+                models.UserDecisionSignal(decision=models.UserDecision.EDIT, additional_prompt="Shorter"),
+            )
+            second = await starter.wait_for_next_draft(handle, first.number)
+            await handle.signal(
+                workflow.GenerateReportWorkflow.user_decision_signal,
+                models.UserDecisionSignal(decision=models.UserDecision.KEEP),
+            )
+            await handle.result()
+
+            # The first draft's render was cancelled but kept running; the kept draft's PDF is written after it
+            assert activities.rendered == [first.content, second.content]
+
+    temporal.run(review)
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+from common import http_clients
+
+
+def test_limits_are_read_per_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HTTP_MAX_CONNECTIONS", "50")
+    monkeypatch.setenv("LLM_HTTP_MAX_CONNECTIONS", "8")
+    monkeypatch.setenv("LLM_HTTP_KEEPALIVE_EXPIRY", "90")
+
+    tools = http_clients.limits_from_env()
+    llm = http_clients.limits_from_env("LLM_HTTP")
+
+    assert (tools.max_connections, tools.max_keepalive_connections, tools.keepalive_expiry) == (50, 20, 30.0)
+    assert (llm.max_connections, llm.max_keepalive_connections, llm.keepalive_expiry) == (8, 20, 90.0)
+
+
+def test_the_llm_client_has_its_own_pool() -> None:
+    async def clients() -> None:
+        try:
+            llm = http_clients.openai_client("key")
+            assert llm is http_clients.openai_client("key")
+            assert llm._client is http_clients.llm_http_client()
+            assert http_clients.llm_http_client() is not http_clients.http_client()
+        finally:
+            await http_clients.close_http_clients()
+
+    asyncio.run(clients())
+    assert http_clients.http_client.cache_info().currsize == 0
+    assert http_clients.llm_http_client.cache_info().currsize == 0
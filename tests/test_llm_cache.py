@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+from common import llm_cache
+from common.llm_cache import MemoryCache, SQLiteCache, cache_from_env, cache_key
+from fakes import FakeClock
+
+
+@dataclass
+class Request:
+    prompt: str
+    options: dict[str, object]
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> None:
+    monkeypatch.setattr(llm_cache, "time", clock)
+
+
+def test_cache_key_is_canonical() -> None:
+    key = cache_key("model", Request("prompt", {"a": 1, "b": 2}))
+
+    assert key == cache_key("model", Request("prompt", {"b": 2, "a": 1}))
+    assert key == cache_key("model", {"prompt": "prompt", "options": {"a": 1, "b": 2}})
+    assert key != cache_key("other-model", Request("prompt", {"a": 1, "b": 2}))
+    assert key != cache_key("model", Request("other prompt", {"a": 1, "b": 2}))
+
+
+def test_cache_key_is_canonical_for_nested_dataclasses() -> None:
+    key = cache_key("model", [Request("prompt", {"a": 1, "b": 2}), ["digest"]])
+
+    assert key == cache_key("model", [Request("prompt", {"b": 2, "a": 1}), ["digest"]])
+    assert key == cache_key("model", [{"options": {"a": 1, "b": 2}, "prompt": "prompt"}, ["digest"]])
+    assert key != cache_key("model", [Request("prompt", {"a": 1, "b": 2}), ["other digest"]])
+
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (3, 1, 1)
+
+
+def test_memory_cache_expires_entries(clock: FakeClock) -> None:
+    cache = MemoryCache(ttl=10)
+    cache.set("key", "value")
+
+    clock.advance(10)
+    assert cache.get("key") == "value"
+    clock.advance(1)
+    assert cache.get("key") is None
+    assert cache.stats.evictions == 1
+
+
+def test_sqlite_cache_expires_and_persists(tmp_path: Path, clock: FakeClock) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCache(path, ttl=10).set("key", "value")
+
+    # A second instance, like another worker on the host, sees the same entries
+    cache = SQLiteCache(path, ttl=10)
+    assert cache.get("key") == "value"
+    clock.advance(11)
+    assert cache.get("key") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (1, 1, 1)
+
+
+def test_cache_from_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    assert cache_from_env() is None
+
+    monkeypatch.setenv("LLM_CACHE", "memory")
+    assert isinstance(cache_from_env(), MemoryCache)
+
+    monkeypatch.setenv("LLM_CACHE", "sqlite")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    assert isinstance(cache_from_env(), SQLiteCache)
+
+    monkeypatch.setenv("LLM_CACHE", "redis")
+    with pytest.raises(ValueError, match="redis"):
+        cache_from_env()
@@ -0,0 +1,216 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+import pytest
+from common import llm_routing
+from common.llm_routing import CircuitBreaker, LLMProvider, LLMRouter
+from fakes import FakeClock
+from temporalio.exceptions import ApplicationError
+from temporalio.testing import ActivityEnvironment
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> None:
+    monkeypatch.setattr(llm_routing, "time", clock)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@dataclass
+class FakeModels:
+    """Answers with the model's name, after raising the errors queued for it or sleeping its latency."""
+
+    errors: dict[str, list[BaseException]] = field(default_factory=dict)
+    latency: dict[str, float] = field(default_factory=dict)
+    calls: list[str] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
+
+    async def complete(self, provider: LLMProvider) -> str:
+        self.calls.append(provider.model)
+        if queued := self.errors.get(provider.model):
+            raise queued.pop(0)
+        try:
+            await asyncio.sleep(self.latency.get(provider.model, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(provider.model)
+            raise
+        return provider.model
+
+
+def router(*models: str, **kwargs: float | bool) -> LLMRouter:
+    options: dict[str, float | bool] = {"hedge": False, "breaker_failures": 2, "breaker_reset": 30.0, **kwargs}
+    return LLMRouter([LLMProvider(model) for model in models], **options)  # type: ignore[arg-type]
+
+
+def call(router: LLMRouter, fn: Callable[[LLMProvider], Awaitable[str]]) -> str:
+    # The router logs through activity.logger, so run it as an Activity would
+    return asyncio.run(ActivityEnvironment().run(router.call, fn))
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        StatusError(503),
+        StatusError(429),
+        StatusError(408),
+        TimeoutError(),
+        ConnectionResetError(),
+        httpx.ConnectError("refused"),
+        ApplicationError("rate limited", type="RateLimited"),
+    ],
+)
+def test_unanswered_and_overloaded_calls_fail_over(error: Exception) -> None:
+    models = FakeModels(errors={"primary": [error]})
+
+    assert call(router("primary", "fallback"), models.complete) == "fallback"
+    assert models.calls == ["primary", "fallback"]
+
+
+@pytest.mark.parametrize("error", [StatusError(400), StatusError(401), KeyError("choices"), TypeError("bad argument")])
+def test_errors_every_model_would_raise_do_not_fail_over(error: Exception) -> None:
+    models = FakeModels(errors={"primary": [error]})
+
+    with pytest.raises(type(error)):
+        call(router("primary", "fallback"), models.complete)
+    assert models.calls == ["primary"]
+
+
+def test_the_last_failure_is_raised_when_every_model_fails() -> None:
+    models = FakeModels(errors={"primary": [StatusError(500)], "fallback": [StatusError(503)]})
+
+    with pytest.raises(StatusError, match="503"):
+        call(router("primary", "fallback"), models.complete)
+
+
+def test_a_slow_primary_is_hedged_and_the_loser_cancelled() -> None:
+    models = FakeModels(latency={"primary": 5.0})
+
+    assert call(router("primary", "fallback", hedge=True, hedge_delay=0.01), models.complete) == "fallback"
+    assert models.calls == ["primary", "fallback"]
+    assert models.cancelled == ["primary"]
+
+
+def test_a_fast_primary_is_not_hedged() -> None:
+    models = FakeModels()
+
+    assert call(router("primary", "fallback", hedge=True, hedge_delay=5.0), models.complete) == "primary"
+    assert models.calls == ["primary"]
+
+
+def test_the_hedge_delay_follows_observed_latency(clock: FakeClock) -> None:
+    routing = router("primary", "fallback", hedge=True, hedge_delay=10.0, hedge_min_delay=2.0)
+    primary = routing.providers[0]
+
+    def answering_in(seconds: float) -> Callable[[LLMProvider], Awaitable[str]]:
+        async def complete(provider: LLMProvider) -> str:
+            clock.advance(seconds)
+            return provider.model
+
+        return complete
+
+    # Until 20 latencies are known, the configured delay is used
+    for _ in range(19):
+        call(routing, answering_in(3.0))
+    assert routing.hedge_delay(primary) == 10.0
+    call(routing, answering_in(3.0))
+    assert routing.hedge_delay(primary) == 3.0
+
+    # Fast answers bring it down, but never below the minimum
+    for _ in range(200):
+        call(routing, answering_in(0.5))
+    assert routing.hedge_delay(primary) == 2.0
+
+
+def test_circuit_breaker_opens_after_consecutive_failures(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.advance(10)
+    assert breaker.retry_in() == 20.0
+
+
+def test_circuit_breaker_lets_one_trial_through_after_the_reset(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    clock.advance(30)
+
+    # Half-open: one trial at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_cancelled()
+    assert breaker.allow()
+
+    # A failed trial opens the breaker for another full reset timeout
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30.0
+
+    # A successful trial closes it
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_an_open_breaker_skips_its_model(clock: FakeClock) -> None:
+    models = FakeModels(errors={"primary": [StatusError(503), StatusError(503)]})
+    routing = router("primary", "fallback")
+
+    call(routing, models.complete)
+    call(routing, models.complete)
+    assert call(routing, models.complete) == "fallback"
+    assert models.calls == ["primary", "fallback", "primary", "fallback", "fallback"]
+
+    # After the reset timeout the primary gets a trial request, and is back once it succeeds
+    clock.advance(30)
+    assert call(routing, models.complete) == "primary"
+
+
+def test_errors_that_do_not_fail_over_leave_the_breaker_closed() -> None:
+    models = FakeModels(errors={"primary": [StatusError(400), StatusError(400)]})
+    routing = router("primary", "fallback")
+
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            call(routing, models.complete)
+    assert call(routing, models.complete) == "primary"
+
+
+def test_every_breaker_open_asks_temporal_to_retry_later(clock: FakeClock) -> None:
+    models = FakeModels(errors={"primary": [StatusError(503)] * 2, "fallback": [StatusError(503)] * 2})
+    routing = router("primary", "fallback")
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            call(routing, models.complete)
+
+    clock.advance(12)
+    with pytest.raises(ApplicationError) as raised:
+        call(routing, models.complete)
+    assert raised.value.type == "ProvidersUnavailable"
+    assert raised.value.next_retry_delay is not None
+    assert raised.value.next_retry_delay.total_seconds() == 18
+
+
+def test_a_single_model_never_trips_a_breaker() -> None:
+    models = FakeModels(errors={"primary": [StatusError(503)] * 5})
+    routing = router("primary")
+
+    for _ in range(5):
+        with pytest.raises(StatusError):
+            call(routing, models.complete)
+    assert call(routing, models.complete) == "primary"
@@ -0,0 +1,79 @@
+import asyncio
+import subprocess
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from common import pdf_activities
+from common.blob_store import sink_from_env
+from common.report_models import PDFGenerationInput, PDFOutput
+from common.report_rendering import render_pdf
+from temporalio.testing import ActivityEnvironment
+
+DEMOS = Path(__file__).resolve().parents[1] / "demos"
+
+
+@pytest.fixture
+def pdf_executor() -> Iterator[None]:
+    """Give a test a fresh PDF pool for the PDF_EXECUTOR it sets, and shut the pool down afterwards."""
+    pdf_activities.pdf_executor_from_env.cache_clear()
+    yield
+    if pdf_activities.pdf_executor_from_env.cache_info().currsize:
+        pdf_activities.pdf_executor_from_env().shutdown()
+    pdf_activities.pdf_executor_from_env.cache_clear()
+
+
+def test_render_pdf_writes_the_requested_file(tmp_path: Path) -> None:
+    filename = str(tmp_path / "report.pdf")
+
+    assert render_pdf(PDFGenerationInput(content="# Title\n\nBody", filename=filename)) == filename
+    assert Path(filename).read_bytes().startswith(b"%PDF")
+
+
+def test_render_pdf_stores_blobs_by_content(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PDF_SINK_DIR", str(tmp_path))
+    sink_from_env.cache_clear()
+    try:
+        first = render_pdf(PDFGenerationInput(content="Same report", output=PDFOutput.BLOB))
+        second = render_pdf(PDFGenerationInput(content="Same report", output=PDFOutput.BLOB))
+        other = render_pdf(PDFGenerationInput(content="Another report", output=PDFOutput.BLOB))
+    finally:
+        sink_from_env.cache_clear()
+
+    assert first == second != other
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([Path(first).name, Path(other).name])
+
+
+def test_import_creates_no_pool_or_litellm() -> None:
+    # A fresh interpreter, as in a spawned rendering process
+    code = (
+        "import multiprocessing, sys\n"
+        "from common import pdf_activities\n"
+        "assert pdf_activities.pdf_executor_from_env.cache_info().currsize == 0\n"
+        "assert not multiprocessing.active_children()\n"
+        "assert 'litellm' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=DEMOS, check=True)
+
+
+@pytest.mark.usefixtures("pdf_executor")
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_create_pdf_renders_on_the_configured_pool(
+    executor: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("PDF_EXECUTOR", executor)
+    monkeypatch.setenv("PDF_MAX_WORKERS", "2")
+    filenames = [str(tmp_path / f"report-{i}.pdf") for i in range(3)]
+
+    async def render_all() -> list[str]:
+        env = ActivityEnvironment()
+        return await asyncio.gather(
+            *(
+                env.run(pdf_activities.create_pdf, PDFGenerationInput(content=f"Report {i}", filename=filename))
+                for i, filename in enumerate(filenames)
+            )
+        )
+
+    assert asyncio.run(render_all()) == filenames
+    assert all(Path(filename).read_bytes().startswith(b"%PDF") for filename in filenames)
@@ -0,0 +1,195 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from common import rate_limit
+from common.rate_limit import AdaptiveConcurrency, RateLimiter, TokenBucket, throttled
+from fakes import FakeClock
+from temporalio.exceptions import ApplicationError
+from temporalio.testing import ActivityEnvironment
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> None:
+    monkeypatch.setattr(rate_limit, "time", clock)
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str | None = None) -> None:
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def reserve(supplier: AdaptiveConcurrency) -> bool:
+    # The supplier doesn't look at the slot contexts
+    return supplier.try_reserve_slot(None) is not None  # type: ignore[arg-type]
+
+
+def test_token_bucket_spaces_out_requests(clock: FakeClock) -> None:
+    async def scenario() -> None:
+        bucket = TokenBucket(per_minute=120)
+        for _ in range(4):
+            await bucket.acquire()
+
+    asyncio.run(scenario())
+    # The bucket holds one second's worth (2 requests), then releases one every half second
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_token_bucket_refills_over_time(clock: FakeClock) -> None:
+    async def scenario() -> None:
+        bucket = TokenBucket(per_minute=120)
+        await bucket.acquire(2)
+        clock.advance(10)
+        await bucket.acquire(2)
+
+    asyncio.run(scenario())
+    # Never more than a full bucket, however long it was idle
+    assert clock.sleeps == []
+
+
+def test_token_bucket_lets_large_requests_through_into_debt(clock: FakeClock) -> None:
+    async def scenario() -> None:
+        bucket = TokenBucket(per_minute=600)
+        await bucket.acquire(30)
+        await bucket.acquire(1)
+
+    asyncio.run(scenario())
+    # 30 tokens from a 10-token bucket leaves it 20 short, which takes 2.1 seconds to refill with one to spare
+    assert clock.sleeps == [pytest.approx(2.1)]
+
+
+def test_token_bucket_debit_corrects_the_estimate(clock: FakeClock) -> None:
+    async def scenario() -> None:
+        bucket = TokenBucket(per_minute=600)
+        await bucket.acquire(10)
+        bucket.debit(10)
+        await bucket.acquire(10)
+        bucket.debit(-100)
+        await bucket.acquire(10)
+        await bucket.acquire(10)
+
+    asyncio.run(scenario())
+    # Underestimated usage is paid back before the next request; a refund never overfills the bucket
+    assert clock.sleeps == [pytest.approx(2.0), pytest.approx(1.0)]
+
+
+def test_rate_limiter_keeps_separate_buckets_per_model(clock: FakeClock) -> None:
+    async def scenario() -> None:
+        limiter = RateLimiter(requests_per_minute=60)
+        await limiter.acquire("primary", 100)
+        await limiter.acquire("fallback", 100)
+        assert clock.sleeps == []
+        await limiter.acquire("primary", 100)
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [1.0]
+
+
+def test_adaptive_concurrency_hands_out_up_to_limit_slots() -> None:
+    concurrency = AdaptiveConcurrency(initial=2)
+
+    assert [reserve(concurrency) for _ in range(3)] == [True, True, False]
+    concurrency.release_slot(None)  # type: ignore[arg-type]
+    assert reserve(concurrency)
+
+
+def test_adaptive_concurrency_grows_by_one_slot_per_round() -> None:
+    concurrency = AdaptiveConcurrency(initial=4, maximum=5)
+
+    for _ in range(4):
+        concurrency.on_success(latency=0.1)
+    assert concurrency.limit == pytest.approx(5, abs=0.1)
+
+    for _ in range(10):
+        concurrency.on_success(latency=0.1)
+    assert concurrency.limit == 5
+
+
+def test_adaptive_concurrency_halves_once_per_burst_of_overloads(clock: FakeClock) -> None:
+    concurrency = AdaptiveConcurrency(initial=16, minimum=3, cooldown=1.0)
+
+    concurrency.on_overload()
+    concurrency.on_overload()
+    assert concurrency.limit == 8
+
+    clock.advance(1)
+    concurrency.on_overload()
+    assert concurrency.limit == 4
+
+    clock.advance(1)
+    concurrency.on_overload()
+    assert concurrency.limit == 3
+
+
+def test_adaptive_concurrency_treats_slow_calls_as_overload() -> None:
+    concurrency = AdaptiveConcurrency(initial=10, latency_target=2.0)
+
+    concurrency.on_success(latency=1.0)
+    assert concurrency.limit == pytest.approx(10.1)
+    concurrency.on_success(latency=3.0)
+    assert concurrency.limit == pytest.approx(5.05)
+
+
+@pytest.fixture
+def adaptive(monkeypatch: pytest.MonkeyPatch) -> AdaptiveConcurrency:
+    concurrency = AdaptiveConcurrency(initial=10)
+    monkeypatch.setattr(rate_limit, "adaptive_concurrency_from_env", lambda: concurrency)
+    monkeypatch.setattr(rate_limit, "rate_limiter_from_env", RateLimiter)
+    return concurrency
+
+
+def test_throttled_turns_retry_after_into_the_next_retry_delay(adaptive: AdaptiveConcurrency) -> None:
+    async def scenario() -> None:
+        async with throttled("primary", 100):
+            raise RateLimited(retry_after="7")
+
+    with pytest.raises(ApplicationError) as raised:
+        asyncio.run(scenario())
+    assert raised.value.type == "RateLimited"
+    assert raised.value.next_retry_delay is not None
+    assert raised.value.next_retry_delay.total_seconds() == 7
+    assert adaptive.limit == 5
+
+
+def test_throttled_reraises_other_errors(adaptive: AdaptiveConcurrency) -> None:
+    async def scenario(error: Exception) -> None:
+        async with throttled("primary", 100):
+            raise error
+
+    with pytest.raises(RateLimited):
+        asyncio.run(scenario(RateLimited()))
+    with pytest.raises(ValueError):
+        asyncio.run(scenario(ValueError("bad request")))
+    # Only the 429 counted as overload
+    assert adaptive.limit == 5
+
+
+def test_throttled_heartbeats_while_waiting_for_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rate_limit, "BUDGET_HEARTBEAT_INTERVAL", 0.001)
+    heartbeats: list[tuple[object, ...]] = []
+    budget = asyncio.Event()
+
+    class WaitingLimiter(RateLimiter):
+        async def acquire(self, model: str, estimated_tokens: int) -> None:  # noqa: ARG002
+            await budget.wait()
+
+    def heartbeat(*details: object) -> None:
+        heartbeats.append(details)
+        if len(heartbeats) == 3:
+            budget.set()
+
+    monkeypatch.setattr(rate_limit, "rate_limiter_from_env", WaitingLimiter)
+
+    async def call() -> str:
+        async with throttled("gpt", 10, heartbeat_details=("text so far",)):
+            return "answered"
+
+    env = ActivityEnvironment()
+    env.on_heartbeat = heartbeat
+    assert asyncio.run(env.run(call)) == "answered"
+    # The resume text is heartbeated, so waiting doesn't replace it with empty details
+    assert heartbeats == [("text so far",)] * 3
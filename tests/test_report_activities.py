@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field, replace
+from types import SimpleNamespace
+
+import pytest
+from common import report_activities
+from common.llm_cache import MemoryCache
+from common.llm_routing import LLMProvider, LLMRouter
+from common.report_models import LLMCallInput, LLMCallResult, ResearchProgress, TokenUsage
+from fakes import FakeClock
+from litellm.types.utils import ModelResponse, Usage
+from temporalio.testing import ActivityEnvironment
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+@dataclass
+class FakeLLM:
+    failing: set[str] = field(default_factory=set)
+    calls: list[str] = field(default_factory=list)
+
+    async def acompletion(self, model: str, api_key: str | None, messages: list[dict[str, str]]) -> ModelResponse:  # noqa: ARG002
+        self.calls.append(model)
+        if model in self.failing:
+            raise ServerError(f"{model} is down")
+        return ModelResponse(
+            model=model,
+            choices=[
+                {"index": 0, "finish_reason": "stop", "message": {"content": f"{model} answer", "role": "assistant"}}
+            ],
+        )
+
+
+@pytest.fixture
+def llm(monkeypatch: pytest.MonkeyPatch) -> FakeLLM:
+    fake = FakeLLM()
+    router = LLMRouter([LLMProvider("primary"), LLMProvider("fallback")], hedge=False)
+    monkeypatch.setattr(report_activities, "acompletion", fake.acompletion)
+    monkeypatch.setattr(report_activities, "llm_router_from_env", lambda: router)
+    monkeypatch.setattr(report_activities, "LLM_MODEL", "primary")
+    monkeypatch.setattr(report_activities, "RESPONSE_CACHE", MemoryCache())
+    return fake
+
+
+def call(prompt: str) -> str:
+    result = asyncio.run(ActivityEnvironment().run(report_activities.llm_call, LLMCallInput(prompt=prompt)))
+    return result.content
+
+
+def test_llm_call_answers_repeats_from_the_cache(llm: FakeLLM) -> None:
+    assert call("prompt") == "primary answer"
+    assert call("prompt") == "primary answer"
+    assert llm.calls == ["primary"]
+
+
+def test_llm_call_does_not_cache_fallback_answers(llm: FakeLLM) -> None:
+    llm.failing.add("primary")
+    assert call("prompt") == "fallback answer"
+
+    llm.failing.clear()
+    assert call("prompt") == "primary answer"
+    assert llm.calls == ["primary", "fallback", "primary"]
+
+
+@dataclass
+class FakeStreamingLLM:
+    """Streams ``chunks``, each arriving ``seconds`` after the previous one, then reports usage."""
+
+    clock: FakeClock
+    chunks: list[tuple[float, str]]
+    finish_reason: str = "stop"
+    requests: list[list[dict[str, str]]] = field(default_factory=list)
+
+    async def acompletion(self, messages: list[dict[str, str]], **_options: object) -> AsyncIterator[SimpleNamespace]:
+        self.requests.append(messages)
+        return self.stream()
+
+    async def stream(self) -> AsyncIterator[SimpleNamespace]:
+        for i, (seconds, text) in enumerate(self.chunks):
+            self.clock.advance(seconds)
+            finish_reason = self.finish_reason if i == len(self.chunks) - 1 else None
+            delta = SimpleNamespace(content=text)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)], usage=None)
+        yield SimpleNamespace(choices=[], usage=Usage(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+
+
+@dataclass
+class FakeWorkflowClient:
+    """Stands in for the Client an Activity signals its Workflow through, recording the progress signals."""
+
+    progress: list[ResearchProgress] = field(default_factory=list)
+
+    def get_workflow_handle(self, workflow_id: str) -> "FakeWorkflowClient":  # noqa: ARG002
+        return self
+
+    async def signal(self, signal: str, progress: ResearchProgress) -> None:
+        assert signal == "research_progress_signal"
+        self.progress.append(progress)
+
+
+@pytest.fixture
+def streaming(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> FakeStreamingLLM:
+    fake = FakeStreamingLLM(clock, chunks=[(0, "Tardigrades "), (0.5, "are "), (1.0, "tiny.")], finish_reason="length")
+    monkeypatch.setattr(report_activities, "acompletion", fake.acompletion)
+    monkeypatch.setattr(report_activities, "time", clock)
+    monkeypatch.setattr(report_activities, "LLM_MODEL", "primary")
+    monkeypatch.setattr(report_activities, "RESPONSE_CACHE", MemoryCache())
+    return fake
+
+
+def stream(
+    prompt: str, heartbeat_details: list[object] | None = None
+) -> tuple[LLMCallResult, FakeWorkflowClient, list[object]]:
+    workflow = FakeWorkflowClient()
+    heartbeats: list[object] = []
+    env = ActivityEnvironment(client=workflow)  # type: ignore[arg-type]
+    env.info = replace(env.info, heartbeat_details=heartbeat_details or [])
+    env.on_heartbeat = lambda *details: heartbeats.extend(details)
+    result = asyncio.run(env.run(report_activities.stream_llm_call, LLMCallInput(prompt=prompt)))
+    return result, workflow, heartbeats
+
+
+def test_stream_llm_call_heartbeats_and_signals_the_text_so_far(streaming: FakeStreamingLLM) -> None:
+    result, workflow, heartbeats = stream("Tell me about tardigrades")
+
+    assert result == LLMCallResult(
+        content="Tardigrades are tiny.",
+        finish_reason="length",
+        usage=TokenUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+    )
+    assert heartbeats == ["Tardigrades ", "Tardigrades are ", "Tardigrades are tiny."]
+    # At most one signal per STREAM_PROGRESS_INTERVAL, each holding only the text the workflow hasn't seen
+    assert workflow.progress == [
+        ResearchProgress(offset=0, text="Tardigrades "),
+        ResearchProgress(offset=12, text="are tiny."),
+    ]
+    assert streaming.requests == [[{"content": "Tell me about tardigrades", "role": "user"}]]
+
+
+def test_stream_llm_call_resumes_from_the_heartbeated_text(streaming: FakeStreamingLLM) -> None:
+    streaming.chunks = [(0, "are "), (0, "tiny.")]
+
+    result, workflow, heartbeats = stream("Tell me about tardigrades", heartbeat_details=["Tardigrades "])
+
+    assert streaming.requests == [
+        [
+            {"content": "Tell me about tardigrades", "role": "user"},
+            {"content": "Tardigrades ", "role": "assistant"},
+            {"content": report_activities.CONTINUE_PROMPT, "role": "user"},
+        ]
+    ]
+    assert result.content == "Tardigrades are tiny."
+    assert heartbeats[-1] == "Tardigrades are tiny."
+    # The first signal replaces whatever the workflow had from the failed attempt
+    assert workflow.progress[0] == ResearchProgress(offset=0, text="Tardigrades are ")
+
+
+@pytest.mark.usefixtures("llm")
+def test_stream_llm_call_shares_cache_entries_with_llm_call(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> None:
+    assert call("prompt") == "primary answer"
+
+    # A streamed call for the same prompt is answered from the cache, without streaming
+    streaming = FakeStreamingLLM(clock, chunks=[(0, "streamed answer")])
+    monkeypatch.setattr(report_activities, "acompletion", streaming.acompletion)
+    result, workflow, _ = stream("prompt")
+    assert result.content == "primary answer"
+    assert streaming.requests == []
+    assert workflow.progress == []
+
+    # And llm_call is answered from what a streamed call stored
+    stream("another prompt")
+    assert call("another prompt") == "streamed answer"
@@ -0,0 +1,43 @@
+import sys
+from collections.abc import Callable
+from dataclasses import fields
+from types import ModuleType
+
+import pytest
+
+
+def test_every_report_config_field_has_a_worker_default(
+    demo_module: Callable[[str, str], ModuleType], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    activities = demo_module("module_one_02_adding_durability", "activities")
+    models = sys.modules["models"]
+    overrides = {
+        "DEMO_PAUSE_SECONDS": "2.5",
+        "LLM_TIMEOUT_SECONDS": "60",
+        "STREAM_TIMEOUT_SECONDS": "600",
+        "HEARTBEAT_TIMEOUT_SECONDS": "45",
+        "PDF_TIMEOUT_SECONDS": "90",
+        "RETRY_INITIAL_INTERVAL_SECONDS": "0.5",
+        "LLM_MAX_ATTEMPTS": "4",
+        "PDF_MAX_ATTEMPTS": "5",
+    }
+    for name, value in overrides.items():
+        monkeypatch.setenv(name, value)
+
+    config = activities.report_config_from_env()
+
+    assert config == models.ReportConfig(
+        demo_pause_seconds=2.5,
+        llm_timeout_seconds=60,
+        stream_timeout_seconds=600,
+        heartbeat_timeout_seconds=45,
+        pdf_timeout_seconds=90,
+        retry_initial_interval_seconds=0.5,
+        llm_max_attempts=4,
+        pdf_max_attempts=5,
+    )
+    # A field added to ReportConfig without an environment variable would still hold its default
+    defaults = models.ReportConfig()
+    assert [
+        field.name for field in fields(config) if getattr(config, field.name) == getattr(defaults, field.name)
+    ] == []
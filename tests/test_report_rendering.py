@@ -0,0 +1,116 @@
+import base64
+import re
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+
+from common.report_rendering import Block, FlowableStream, iter_blocks, iter_flowables, iter_lines, render_report
+
+
+def blocks(text: str) -> list[Block]:
+    return list(iter_blocks(iter_lines(text)))
+
+
+def page_text(pdf: bytes) -> bytes:
+    """The decoded page content streams of a reportlab PDF, where its text is drawn."""
+    # reportlab encodes compressed streams as ASCII85 on top of Flate
+    streams = re.findall(rb"/ASCII85Decode /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)~>", pdf, re.S)
+    return b"".join(zlib.decompress(base64.a85decode(stream)) for stream in streams)
+
+
+def take(stream: FlowableStream) -> None:
+    # What the build does with the flowable it draws
+    stream[0]
+    del stream[0]
+
+
+def test_iter_lines_splits_like_str_split() -> None:
+    for text in ["", "one", "one\ntwo", "one\n", "\n\none\n\n"]:
+        assert list(iter_lines(text)) == text.split("\n")
+
+
+def test_paragraphs_are_joined_and_separated_by_blank_lines() -> None:
+    assert blocks("First line\nsecond line\n\n\nNext paragraph\r\n") == [
+        Block("paragraph", "First line second line"),
+        Block("paragraph", "Next paragraph"),
+    ]
+
+
+def test_headings_keep_their_level() -> None:
+    assert blocks("# Title\nIntro\n### Details ###\n####### Not a heading") == [
+        Block("heading", "Title", level=1),
+        Block("paragraph", "Intro"),
+        Block("heading", "Details", level=3),
+        Block("paragraph", "####### Not a heading"),
+    ]
+
+
+def test_list_items_take_their_continuation_lines() -> None:
+    assert blocks("- one\n  more of one\n* two\n1. first\n2) second") == [
+        Block("list_item", "one more of one", bullet="•"),
+        Block("list_item", "two", bullet="•"),
+        Block("list_item", "first", bullet="1."),
+        Block("list_item", "second", bullet="2)"),
+    ]
+
+
+def test_code_blocks_are_kept_verbatim() -> None:
+    assert blocks("Before\n```python\n# not a heading\n\n    - not a list\n```\nAfter\n```\nunclosed") == [
+        Block("paragraph", "Before"),
+        Block("code", "# not a heading\n\n    - not a list"),
+        Block("paragraph", "After"),
+        Block("code", "unclosed"),
+    ]
+
+
+def test_flowable_stream_buffers_only_the_lookahead() -> None:
+    consumed = 0
+
+    def counted(text: str) -> Iterator[object]:
+        nonlocal consumed
+        for flowable in iter_flowables(text):
+            consumed += 1
+            yield flowable
+
+    stream = FlowableStream(counted("\n\n".join(f"Paragraph {i}" for i in range(100)) + "\n\n# Heading\n\nLast"))
+    # Nothing past the title is read until the build asks for it
+    assert len(stream) == 1
+    assert consumed == 1
+
+    # The title and its spacer, then each paragraph and its spacer
+    for _ in range(202):
+        take(stream)
+    assert consumed == 202
+
+    # A heading is kept with the next block, so the build sees both at once
+    assert len(stream) == 2
+    assert consumed == 204
+
+
+def test_render_report_renders_a_large_report_from_lines(tmp_path: Path) -> None:
+    paragraphs = 5000
+
+    def lines() -> Iterator[str]:
+        for i in range(paragraphs):
+            if i % 50 == 0:
+                yield f"## Section {i // 50}\n"
+            yield f"Paragraph {i}: " + "lorem ipsum dolor sit amet " * 8 + "\n"
+            yield "\n"
+
+    path = tmp_path / "large.pdf"
+    render_report(lines(), str(path))
+
+    pdf = path.read_bytes()
+    assert pdf.startswith(b"%PDF")
+    assert pdf.rstrip().endswith(b"%%EOF")
+    assert len(re.findall(rb"/Type /Page\b", pdf)) > 300
+    text = page_text(pdf)
+    assert b"Section 99" in text
+    assert f"Paragraph {paragraphs - 1}:".encode() in text
+
+
+def test_code_blocks_are_drawn_as_written(tmp_path: Path) -> None:
+    path = tmp_path / "code.pdf"
+    render_report("Compare them:\n```\nif a < b && c:\n```", str(path))
+
+    assert b"if a < b && c:" in page_text(path.read_bytes())
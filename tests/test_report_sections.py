@@ -0,0 +1,81 @@
+import asyncio
+import sys
+from collections.abc import Callable
+from types import ModuleType
+
+import pytest
+from common.report_models import LLMCallInput, LLMCallResult, TokenUsage
+
+DURABILITY = "module_one_02_adding_durability"
+
+
+@pytest.fixture
+def workflow(demo_module: Callable[[str, str], ModuleType]) -> ModuleType:
+    # The workflow imports the activities and models modules, which the tests reach through sys.modules
+    return demo_module(DURABILITY, "workflow")
+
+
+def outline(monkeypatch: pytest.MonkeyPatch, reply: str, max_sections: int = 12) -> list[str]:
+    activities = sys.modules["activities"]
+
+    async def llm_call(input: LLMCallInput) -> LLMCallResult:  # noqa: ARG001
+        return LLMCallResult(content=reply)
+
+    monkeypatch.setattr(activities, "llm_call", llm_call)
+    input = sys.modules["models"].OutlineInput(prompt="Tardigrades", max_sections=max_sections)
+    return asyncio.run(activities.create_outline(input)).sections
+
+
+@pytest.mark.usefixtures("workflow")
+def test_outline_titles_lose_their_numbering_and_bullets(monkeypatch: pytest.MonkeyPatch) -> None:
+    reply = "1. Anatomy\n2) Habitats\n- **Survival**\n* Reproduction\n## Section 5: Research\n\n+ Open questions"
+
+    assert outline(monkeypatch, reply) == [
+        "Anatomy",
+        "Habitats",
+        "Survival",
+        "Reproduction",
+        "Research",
+        "Open questions",
+    ]
+
+
+@pytest.mark.usefixtures("workflow")
+def test_outline_drops_a_preamble_but_keeps_titles_ending_in_a_colon(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert outline(monkeypatch, "Here is the outline:\n\n1. Anatomy\n2. Conclusion:") == ["Anatomy", "Conclusion:"]
+
+
+@pytest.mark.usefixtures("workflow")
+def test_outline_is_capped_at_max_sections(monkeypatch: pytest.MonkeyPatch) -> None:
+    reply = "\n".join(f"{i}. Part {i}" for i in range(1, 10))
+
+    assert outline(monkeypatch, reply, max_sections=3) == ["Part 1", "Part 2", "Part 3"]
+
+
+@pytest.mark.usefixtures("workflow")
+def test_outline_without_titles_falls_back_to_one_section(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert outline(monkeypatch, "Here is the outline:\n\n- \n") == ["Tardigrades"]
+
+
+def test_sections_are_assembled_under_their_titles(workflow: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    models = sys.modules["models"]
+    prompts: list[str] = []
+
+    async def execute_activity(activity: Callable[..., object], arg: object, **_options: object) -> object:
+        # Stands in for workflow.execute_activity, answering the outline and each section without a Worker
+        if activity is workflow.create_outline:
+            return models.ReportOutline(sections=["Anatomy", "Habitats"])
+        assert isinstance(arg, LLMCallInput)
+        prompts.append(arg.prompt)
+        title = arg.prompt.split('Write only the section "')[1].split('"')[0]
+        return LLMCallResult(content=f"\n  About {title}.\n", usage=TokenUsage(10, 20, 30))
+
+    monkeypatch.setattr(workflow.workflow, "execute_activity", execute_activity)
+    input = models.GenerateReportInput(prompt="Tardigrades", sections=True)
+    result = asyncio.run(workflow.GenerateReportWorkflow()._research_sections(input, models.ReportConfig()))
+
+    assert result.content == "## Anatomy\n\nAbout Anatomy.\n\n## Habitats\n\nAbout Habitats."
+    assert result.usage == TokenUsage(prompt_tokens=20, completion_tokens=40, total_tokens=60)
+    # Every section is written knowing the whole outline
+    assert len(prompts) == 2
+    assert all("- Anatomy\n- Habitats" in prompt for prompt in prompts)
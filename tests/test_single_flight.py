@@ -0,0 +1,144 @@
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+from common import single_flight
+from common.single_flight import SingleFlight
+from fakes import FakeClock
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> None:
+    monkeypatch.setattr(single_flight, "time", clock)
+
+
+@dataclass
+class Upstream:
+    """Counts requests, and holds each one until ``release`` is set."""
+
+    calls: int = 0
+    failing: bool = False
+
+    def __post_init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def fetch(self) -> str:
+        self.calls += 1
+        await self.release.wait()
+        if self.failing:
+            raise ConnectionError("upstream is down")
+        return f"result {self.calls}"
+
+
+async def settle() -> None:
+    # Let every started task run up to its first await
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_calls_share_one_request() -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight()
+        upstream = Upstream()
+        callers = [asyncio.create_task(group.do("CA", upstream.fetch)) for _ in range(5)]
+        await settle()
+        upstream.release.set()
+
+        assert await asyncio.gather(*callers) == ["result 1"] * 5
+        assert upstream.calls == 1
+        assert (group.stats.calls, group.stats.coalesced) == (1, 4)
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_are_not_coalesced() -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight()
+        upstream = Upstream()
+        upstream.release.set()
+
+        assert await asyncio.gather(group.do("CA", upstream.fetch), group.do("NY", upstream.fetch)) == [
+            "result 1",
+            "result 2",
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_results_are_reused_until_the_ttl_expires(clock: FakeClock) -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight(ttl=60)
+        upstream = Upstream()
+        upstream.release.set()
+
+        assert await group.do("CA", upstream.fetch) == "result 1"
+        clock.advance(60)
+        assert await group.do("CA", upstream.fetch) == "result 1"
+        assert group.stats.cache_hits == 1
+
+        clock.advance(1)
+        assert await group.do("CA", upstream.fetch) == "result 2"
+
+    asyncio.run(scenario())
+
+
+def test_without_a_ttl_finished_calls_are_not_reused() -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight()
+        upstream = Upstream()
+        upstream.release.set()
+
+        await group.do("CA", upstream.fetch)
+        assert await group.do("CA", upstream.fetch) == "result 2"
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_shared_but_not_cached() -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight(ttl=60)
+        upstream = Upstream(failing=True)
+        callers = [asyncio.create_task(group.do("CA", upstream.fetch)) for _ in range(3)]
+        await settle()
+        upstream.release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert upstream.calls == 1
+
+        upstream.failing = False
+        assert await group.do("CA", upstream.fetch) == "result 2"
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others() -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight()
+        upstream = Upstream()
+        first = asyncio.create_task(group.do("CA", upstream.fetch))
+        second = asyncio.create_task(group.do("CA", upstream.fetch))
+        await settle()
+
+        first.cancel()
+        await settle()
+        upstream.release.set()
+
+        assert await second == "result 1"
+        assert first.cancelled()
+
+    asyncio.run(scenario())
+
+
+def test_the_cache_keeps_the_most_recent_results() -> None:
+    async def scenario() -> None:
+        group: SingleFlight[str] = SingleFlight(ttl=60, max_entries=2)
+        upstream = Upstream()
+        upstream.release.set()
+
+        for key in ["CA", "NY", "TX"]:
+            await group.do(key, upstream.fetch)
+        assert await group.do("TX", upstream.fetch) == "result 3"
+        assert await group.do("CA", upstream.fetch) == "result 4"
+
+    asyncio.run(scenario())